@@ -0,0 +1,204 @@
+"""
+Control de admisión: cada ruta pertenece a una clase con un límite de concurrencia propio,
+una cola acotada y un tiempo máximo de espera. Una ráfaga de logins o de listados completos
+satura solo su clase; el resto de las rutas sigue entrando por la suya.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+from fastapi.responses import JSONResponse
+from starlette.routing import compile_path
+from app.core.config import settings
+from app.core.metrics import admission_queue_wait, admission_rejected, admission_state
+
+# (método, plantilla de ruta, clase, peso). Se evalúan en orden; lo que no aparece va a
+# "default". Clase None: sin control (scrapes de métricas y streams de larga duración,
+# que ocuparían una unidad mientras dure la conexión).
+ROUTE_CLASSES = [
+    ("GET", "/metrics", None, 0),
+    ("GET", "/debts/changes/stream", None, 0),
+    ("POST", "/auth/login", "auth", 1),
+    ("POST", "/users/", "auth", 1),
+    ("GET", "/users/", "heavy", 1),
+    ("GET", "/users/activeUsers", "heavy", 1),
+    ("GET", "/debts/", "heavy", 1),
+    ("GET", "/debts/summary/leaderboard", "heavy", 1),
+    ("GET", "/debts/search", "heavy", 1),
+    ("GET", "/debts/filter", "heavy", 1),
+    ("GET", "/debts/export", "heavy", 2),
+    ("POST", "/debts/bulk", "heavy", 2),
+    ("POST", "/debts/import", "heavy", 4),
+    ("PATCH", "/debts/pay", "heavy", 1),
+    ("PATCH", "/debts/pay/before/{before}", "heavy", 2),
+    ("PATCH", "/debts/user/{user_id}/pay", "heavy", 1),
+]
+
+class AdmissionRejected(Exception):
+
+    def __init__(self, admission_class: "AdmissionClass", reason: str):
+        super().__init__(reason)
+        self.admission_class = admission_class
+        self.reason = reason
+
+class AdmissionClass:
+    """
+    Semáforo con pesos y cola FIFO acotada. Al liberar, las unidades pasan directamente
+    al primero de la cola, así un request nuevo no se adelanta a los que ya esperan.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int,
+        queue_timeout_seconds: float,
+        retry_after_seconds: int,
+        status_code: int = 503
+    ):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.status_code = status_code
+        self.in_use = 0
+        self._waiters: deque[tuple[asyncio.Future, int]] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, weight: int = 1) -> None:
+        # Un peso mayor que el límite nunca entraría: se recorta al límite
+        weight = min(weight, self.limit)
+        started = time.perf_counter()
+
+        if not self._waiters and self.in_use + weight <= self.limit:
+            self.in_use += weight
+            admission_queue_wait.observe(self.name, value=0.0)
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            admission_rejected.inc(self.name, "queue_full")
+            raise AdmissionRejected(self, "queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (waiter, weight)
+        self._waiters.append(entry)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Las unidades llegaron justo al vencer el plazo: se toman igual
+                admission_queue_wait.observe(self.name, value=time.perf_counter() - started)
+                return
+            self._remove(entry)
+            admission_rejected.inc(self.name, "queue_timeout")
+            raise AdmissionRejected(self, "queue_timeout")
+        except asyncio.CancelledError:
+            # Cliente desconectado mientras esperaba: devolver las unidades si ya se asignaron
+            if waiter.done() and not waiter.cancelled():
+                self.release(weight)
+            else:
+                self._remove(entry)
+            raise
+        admission_queue_wait.observe(self.name, value=time.perf_counter() - started)
+
+    def release(self, weight: int = 1) -> None:
+        self.in_use -= min(weight, self.limit)
+        self._wake()
+
+    def _remove(self, entry) -> None:
+        try:
+            self._waiters.remove(entry)
+        except ValueError:
+            pass
+        # Si el que salió bloqueaba la cabeza de la cola, los siguientes pueden entrar
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            waiter, weight = self._waiters[0]
+            if waiter.done():
+                self._waiters.popleft()
+                continue
+            if self.in_use + weight > self.limit:
+                return
+            self._waiters.popleft()
+            self.in_use += weight
+            waiter.set_result(None)
+
+    def samples(self) -> list[tuple[tuple, float]]:
+        return [
+            ((self.name, "in_use"), self.in_use),
+            ((self.name, "limit"), self.limit),
+            ((self.name, "queued"), len(self._waiters)),
+            ((self.name, "max_queue"), self.max_queue),
+        ]
+
+class AdmissionController:
+
+    def __init__(self, classes: dict, routes: list, default_class: str = "default"):
+        self.classes = {name: AdmissionClass(name, **config) for name, config in classes.items()}
+        self.default_class = self.classes.get(default_class)
+        self._routes = [
+            (method, compile_path(path)[0], self.classes[name] if name is not None else None, weight)
+            for method, path, name, weight in routes
+        ]
+
+    def classify(self, method: str, path: str) -> tuple[Optional[AdmissionClass], int]:
+        # El enrutamiento de FastAPI todavía no corrió: se resuelve contra las plantillas
+        if method == "HEAD":
+            method = "GET"
+        for route_method, regex, admission_class, weight in self._routes:
+            if route_method == method and regex.match(path):
+                return admission_class, weight
+        return self.default_class, 1
+
+    def samples(self) -> list[tuple[tuple, float]]:
+        return [sample for admission_class in self.classes.values() for sample in admission_class.samples()]
+
+admission_controller = AdmissionController(settings.ADMISSION_CLASSES, ROUTE_CLASSES)
+
+admission_state.add_callback(admission_controller.samples)
+
+def _rejection_response(exc: AdmissionRejected) -> JSONResponse:
+    admission_class = exc.admission_class
+    if admission_class.status_code == 429:
+        detail = "Demasiadas solicitudes, intenta de nuevo en unos segundos"
+    else:
+        detail = "Servicio saturado, intenta de nuevo en unos segundos"
+    return JSONResponse(
+        {"detail": detail},
+        status_code=admission_class.status_code,
+        headers={"Retry-After": str(admission_class.retry_after_seconds)},
+    )
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI puro: rechaza antes de leer el body y mantiene las unidades hasta
+    que termina de enviarse la respuesta (incluidas las respuestas en streaming).
+    """
+
+    def __init__(self, app, controller: AdmissionController = admission_controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_ENABLED:
+            return await self.app(scope, receive, send)
+
+        admission_class, weight = self.controller.classify(scope["method"], scope["path"])
+        if admission_class is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            await admission_class.acquire(weight)
+        except AdmissionRejected as exc:
+            return await _rejection_response(exc)(scope, receive, send)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission_class.release(weight)
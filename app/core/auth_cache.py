@@ -0,0 +1,107 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.core.config import settings
+
+class AuthenticatedUser:
+    """Datos del usuario autenticado que se guardan en caché (sin password ni sesión de BD)."""
+    __slots__ = ("id", "email", "nombre", "apellido", "is_active")
+
+    def __init__(self, id: int, email: str, nombre: str, apellido: str, is_active: bool):
+        self.id = id
+        self.email = email
+        self.nombre = nombre
+        self.apellido = apellido
+        self.is_active = is_active
+
+    @classmethod
+    def from_user(cls, user) -> "AuthenticatedUser":
+        return cls(user.id, user.email, user.nombre, user.apellido, user.is_active)
+
+    def __repr__(self):
+        return f"<AuthenticatedUser(id={self.id}, email={self.email})>"
+
+class PrincipalCache:
+    """
+    LRU acotado con TTL: token JWT ya verificado -> AuthenticatedUser.
+    Las entradas de un usuario se invalidan explícitamente desde UserRepository
+    cuando se actualiza, cambia de estado o se elimina.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: int):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[AuthenticatedUser, float]] = OrderedDict()
+        self._tokens_by_user: dict[int, set[str]] = {}
+        # Sube con cada invalidación: una carga que empezó antes no se guarda (ver set)
+        self.generation = 0
+
+    def get(self, token: str) -> Optional[AuthenticatedUser]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+
+        principal, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._discard(token)
+            return None
+
+        self._entries.move_to_end(token)
+        return principal
+
+    def set(
+        self,
+        token: str,
+        principal: AuthenticatedUser,
+        token_exp: Optional[float] = None,
+        generation: Optional[int] = None
+    ) -> None:
+        if self.max_size <= 0:
+            return
+        # generation: valor leído antes de consultar la BD. Si hubo una invalidación en el
+        # medio, la fila leída puede ser anterior al commit que la provocó
+        if generation is not None and generation != self.generation:
+            return
+
+        ttl = self.ttl_seconds
+        # Nunca servir desde caché un token que ya expiró
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+
+        self._discard(token)
+        self._entries[token] = (principal, time.monotonic() + ttl)
+        self._tokens_by_user.setdefault(principal.id, set()).add(token)
+
+        while len(self._entries) > self.max_size:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self.generation += 1
+        for token in self._tokens_by_user.pop(user_id, set()):
+            self._entries.pop(token, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tokens_by_user.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _discard(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+
+        tokens = self._tokens_by_user.get(entry[0].id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[0].id]
+
+principal_cache = PrincipalCache(
+    max_size=settings.AUTH_CACHE_MAX_SIZE,
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS
+)
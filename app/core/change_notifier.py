@@ -0,0 +1,34 @@
+import asyncio
+
+class ChangeNotifier:
+    """
+    Aviso en proceso de que hay cambios nuevos en debt_changes.
+    DebtRepository llama a notify() después de cada commit; los streams SSE esperan con
+    wait() en lugar de consultar la BD en cada vuelta. Las escrituras de otros procesos
+    no avisan: por eso wait() tiene timeout y el stream vuelve a consultar igualmente.
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self._event = asyncio.Event()
+
+    def notify(self) -> None:
+        # Despierta a todos los que esperan y deja un evento nuevo para la siguiente espera
+        self.generation += 1
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    async def wait(self, seen_generation: int, timeout: float) -> bool:
+        """
+        Espera un aviso posterior a seen_generation (leída antes de consultar la BD,
+        para no perder un commit que ocurra entre la consulta y la espera).
+        """
+        if self.generation != seen_generation:
+            return True
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+debt_change_notifier = ChangeNotifier()
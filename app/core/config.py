@@ -1,6 +1,131 @@
+import os
+import tempfile
+
+def _env(name: str, default, cast=str):
+    # Los ajustes de infraestructura pueden sobreescribirse por variable de entorno
+    value = os.getenv(name)
+    if value is None:
+        return default
+    if cast is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return cast(value)
+
+def _admission_class(name: str, limit: int, max_queue: int, queue_timeout_seconds: float, retry_after_seconds: int, status_code: int) -> dict:
+    # Cada valor de la clase se puede sobreescribir con ADMISSION_<CLASE>_<AJUSTE>
+    prefix = f"ADMISSION_{name.upper()}_"
+    return {
+        "limit": _env(prefix + "LIMIT", limit, int),
+        "max_queue": _env(prefix + "MAX_QUEUE", max_queue, int),
+        "queue_timeout_seconds": _env(prefix + "QUEUE_TIMEOUT_SECONDS", queue_timeout_seconds, float),
+        "retry_after_seconds": _env(prefix + "RETRY_AFTER_SECONDS", retry_after_seconds, int),
+        "status_code": _env(prefix + "STATUS_CODE", status_code, int),
+    }
+
 class Settings():
     SECRET_KEY: str = "sebastian-corrales-clave-secreta-123"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Base de datos (ver app/database.py): solo SQLite (sqlite+aiosqlite) con PRAGMAs de
+    # producción; otros motores se rechazan al crear el engine
+    DATABASE_URL: str = _env("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
+    # Réplica de solo lectura para las rutas de lectura (vacío = usan el primario).
+    # En local sirve otro archivo SQLite o una URI read-only:
+    #   sqlite+aiosqlite:///file:./test.db?mode=ro&uri=true
+    DATABASE_REPLICA_URL: str = _env("DATABASE_REPLICA_URL", "")
+    DATABASE_ECHO: bool = _env("DATABASE_ECHO", False, bool)
+    DB_POOL_SIZE: int = _env("DB_POOL_SIZE", 5, int)
+    DB_MAX_OVERFLOW: int = _env("DB_MAX_OVERFLOW", 10, int)
+    DB_POOL_TIMEOUT_SECONDS: float = _env("DB_POOL_TIMEOUT_SECONDS", 30.0, float)
+
+    # Se aplican en cada conexión nueva
+    SQLITE_JOURNAL_MODE: str = _env("SQLITE_JOURNAL_MODE", "WAL")  # lectores concurrentes con un escritor
+    SQLITE_SYNCHRONOUS: str = _env("SQLITE_SYNCHRONOUS", "NORMAL")  # seguro con WAL, sin fsync por commit
+    SQLITE_BUSY_TIMEOUT_MS: int = _env("SQLITE_BUSY_TIMEOUT_MS", 5000, int)
+    SQLITE_CACHE_SIZE_KIB: int = _env("SQLITE_CACHE_SIZE_KIB", 65536, int)
+    SQLITE_MMAP_SIZE_BYTES: int = _env("SQLITE_MMAP_SIZE_BYTES", 268435456, int)
+    SQLITE_TEMP_STORE: str = _env("SQLITE_TEMP_STORE", "MEMORY")
+
+    # Caché de tokens verificados -> usuario autenticado (por proceso)
+    AUTH_CACHE_MAX_SIZE: int = _env("AUTH_CACHE_MAX_SIZE", 10_000, int)
+    AUTH_CACHE_TTL_SECONDS: int = _env("AUTH_CACHE_TTL_SECONDS", 60, int)
+
+    # Argon2: si cambian, los hashes existentes se re-generan en el siguiente login
+    # Se ajustan al hardware de cada despliegue por variable de entorno
+    PASSWORD_HASH_TIME_COST: int = _env("PASSWORD_HASH_TIME_COST", 3, int)
+    PASSWORD_HASH_MEMORY_COST: int = _env("PASSWORD_HASH_MEMORY_COST", 65536, int)  # KiB
+    PASSWORD_HASH_PARALLELISM: int = _env("PASSWORD_HASH_PARALLELISM", 4, int)
+
+    # Pool de procesos dedicado al hashing (0 = usar el threadpool)
+    PASSWORD_HASH_WORKERS: int = _env("PASSWORD_HASH_WORKERS", 2, int)
+    # Operaciones en espera permitidas antes de responder 503
+    PASSWORD_HASH_MAX_QUEUE: int = _env("PASSWORD_HASH_MAX_QUEUE", 32, int)
+
+    # Control de admisión por clase de ruta (ver app/core/admission.py).
+    # limit: unidades de concurrencia de la clase (cada ruta consume su peso);
+    # max_queue: requests en espera antes de rechazar; queue_timeout_seconds: espera máxima en cola
+    ADMISSION_ENABLED: bool = _env("ADMISSION_ENABLED", True, bool)
+    ADMISSION_CLASSES: dict = {
+        # Argon2: apenas más que los procesos de hashing, el resto espera o se rechaza
+        "auth": _admission_class(
+            "auth", limit=max(PASSWORD_HASH_WORKERS, 1) * 2, max_queue=16,
+            queue_timeout_seconds=2.0, retry_after_seconds=2, status_code=429,
+        ),
+        # Listados completos, exportación, importación y escrituras masivas
+        "heavy": _admission_class(
+            "heavy", limit=8, max_queue=32,
+            queue_timeout_seconds=5.0, retry_after_seconds=5, status_code=503,
+        ),
+        "default": _admission_class(
+            "default", limit=64, max_queue=256,
+            queue_timeout_seconds=1.0, retry_after_seconds=1, status_code=503,
+        ),
+    }
+
+    # Creación masiva de deudas (POST /debts/bulk)
+    DEBT_BULK_MAX_ITEMS: int = _env("DEBT_BULK_MAX_ITEMS", 10_000, int)
+    DEBT_BULK_INSERT_BATCH_SIZE: int = _env("DEBT_BULK_INSERT_BATCH_SIZE", 1_000, int)
+
+    # Filtros combinables (GET /debts/filter)
+    DEBT_FILTER_MAX_LIMIT: int = _env("DEBT_FILTER_MAX_LIMIT", 1_000, int)
+
+    # Búsqueda de texto completo (GET /debts/search)
+    DEBT_SEARCH_MAX_LIMIT: int = _env("DEBT_SEARCH_MAX_LIMIT", 100, int)
+    DEBT_SEARCH_MAX_TERMS: int = _env("DEBT_SEARCH_MAX_TERMS", 8, int)
+
+    # Filas por lote al exportar deudas en streaming (GET /debts/export)
+    DEBT_EXPORT_BATCH_SIZE: int = _env("DEBT_EXPORT_BATCH_SIZE", 1_000, int)
+
+    # Importación CSV en streaming (POST /debts/import)
+    DEBT_IMPORT_CHUNK_SIZE: int = _env("DEBT_IMPORT_CHUNK_SIZE", 5_000, int)
+    # CSV de filas rechazadas; se borran al salir de los últimos DEBT_IMPORT_MAX_TRACKED reportes
+    DEBT_IMPORT_ERRORS_DIR: str = _env("DEBT_IMPORT_ERRORS_DIR", os.path.join(tempfile.gettempdir(), "fast-api-crud-imports"))
+    DEBT_IMPORT_MAX_TRACKED: int = _env("DEBT_IMPORT_MAX_TRACKED", 100, int)
+    # Tope de un registro todavía incompleto entre lecturas del body
+    DEBT_IMPORT_MAX_RECORD_CHARS: int = _env("DEBT_IMPORT_MAX_RECORD_CHARS", 1_048_576, int)
+
+    # Feed de cambios (GET /debts/changes y su stream SSE)
+    DEBT_CHANGES_MAX_PAGE_SIZE: int = _env("DEBT_CHANGES_MAX_PAGE_SIZE", 1_000, int)
+    # Sondeo de respaldo del stream: cubre escrituras hechas por otros procesos
+    DEBT_CHANGES_POLL_SECONDS: float = _env("DEBT_CHANGES_POLL_SECONDS", 2.0, float)
+    # Comentario keepalive para que proxies no corten una conexión inactiva
+    DEBT_CHANGES_HEARTBEAT_SECONDS: float = _env("DEBT_CHANGES_HEARTBEAT_SECONDS", 15.0, float)
+
+    # Cliente HTTP compartido para la API externa (ver app/infrastructure/external_api.py)
+    EXTERNAL_API_BASE_URL: str = _env("EXTERNAL_API_BASE_URL", "https://jsonplaceholder.typicode.com")
+    EXTERNAL_API_TIMEOUT_SECONDS: float = _env("EXTERNAL_API_TIMEOUT_SECONDS", 10.0, float)
+    EXTERNAL_API_CONNECT_TIMEOUT_SECONDS: float = _env("EXTERNAL_API_CONNECT_TIMEOUT_SECONDS", 5.0, float)
+    EXTERNAL_API_MAX_CONNECTIONS: int = _env("EXTERNAL_API_MAX_CONNECTIONS", 100, int)
+    EXTERNAL_API_MAX_KEEPALIVE_CONNECTIONS: int = _env("EXTERNAL_API_MAX_KEEPALIVE_CONNECTIONS", 20, int)
+    EXTERNAL_API_KEEPALIVE_EXPIRY_SECONDS: float = _env("EXTERNAL_API_KEEPALIVE_EXPIRY_SECONDS", 30.0, float)
+    EXTERNAL_API_HTTP2: bool = _env("EXTERNAL_API_HTTP2", False, bool)  # requiere el paquete h2 (pip install httpx[http2])
+    EXTERNAL_API_RETRIES: int = _env("EXTERNAL_API_RETRIES", 2, int)
+    EXTERNAL_API_RETRY_BACKOFF_SECONDS: float = _env("EXTERNAL_API_RETRY_BACKOFF_SECONDS", 0.2, float)
+
+    # Caché de respuestas de la API externa
+    EXTERNAL_API_CACHE_TTL_SECONDS: float = _env("EXTERNAL_API_CACHE_TTL_SECONDS", 60.0, float)
+    # Ventana extra en la que se sirve el valor vencido mientras se refresca en segundo plano
+    EXTERNAL_API_CACHE_STALE_SECONDS: float = _env("EXTERNAL_API_CACHE_STALE_SECONDS", 300.0, float)
+    EXTERNAL_API_CACHE_MAX_ENTRIES: int = _env("EXTERNAL_API_CACHE_MAX_ENTRIES", 1024, int)
+
 settings = Settings()
\ No newline at end of file
@@ -1,21 +1,40 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.auth_cache import AuthenticatedUser, principal_cache
 from app.core.security import decode_access_token
 from app.database import get_db
 from app.repositories.user_repository import UserRepository
-from app.models.user_model import User
 
 # Security scheme
 security = HTTPBearer()
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+    # Primario, no réplica: lo que se lee aquí queda en caché durante todo el TTL y una
+    # réplica atrasada devolvería un usuario ya desactivado. La sesión solo abre conexión
+    # si hay que consultar (cache miss)
+    db: AsyncSession = Depends(get_db)
+) -> AuthenticatedUser:
     # Obtener token
     token = credentials.credentials
+
+    # Token ya verificado recientemente: sin decodificar ni consultar la BD
+    user = principal_cache.get(token)
+
+    if user is None:
+        user = await _authenticate(token, db)
     
+    # Verificar si el usuario está activo
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Usuario inactivo"
+        )
+    
+    return user
+
+async def _authenticate(token: str, db: AsyncSession) -> AuthenticatedUser:
     # Decodificar token
     payload = decode_access_token(token)
     
@@ -35,22 +54,19 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    generation = principal_cache.generation
+
     # Buscar usuario en BD
     user_repo = UserRepository(db)
-    user = user_repo.get_by_email(email)
+    db_user = await user_repo.get_by_email(email)
     
-    if user is None:
+    if db_user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario no encontrado",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    # Verificar si el usuario está activo
-    if not user.is_active:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Usuario inactivo"
-        )
-    
-    return user
\ No newline at end of file
+
+    user = AuthenticatedUser.from_user(db_user)
+    principal_cache.set(token, user, token_exp=payload.get("exp"), generation=generation)
+    return user
@@ -0,0 +1,27 @@
+from typing import Optional
+from fastapi import Response, status
+
+# Revalidación obligatoria en cada uso: el cliente siempre pregunta, el servidor responde 304
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(kind: str, user_id: int, version: Optional[int]) -> Optional[str]:
+    """ETag fuerte a partir del contador de versiones del usuario (None si no hay contador)."""
+    if version is None:
+        return None
+    return f'"{kind}{user_id}-{version}"'
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    if not if_none_match or etag is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+def etag_headers(etag: Optional[str]) -> dict:
+    if etag is None:
+        return {}
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
@@ -0,0 +1,77 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.metrics import password_hash_duration, password_hash_rejected
+from app.core.security import get_password_hash, verify_and_update_password
+
+class PasswordHasher:
+    """
+    Ejecuta argon2 en un pool de procesos dedicado, fuera del event loop y sin
+    retener el GIL del worker. La cola es acotada: si está llena se responde 503
+    de inmediato en lugar de acumular latencia.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.max_queue
+
+    def start(self) -> None:
+        if self._executor is None and self.workers > 0:
+            # spawn: los procesos hijos no heredan el event loop ni las conexiones abiertas
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        return await self._run("verify", verify_and_update_password, password, hashed_password)
+
+    async def _run(self, operation: str, fn: Callable, *args):
+        if self._in_flight >= self.capacity:
+            password_hash_rejected.inc(operation)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Servicio saturado, intenta de nuevo en unos segundos",
+                headers={"Retry-After": "1"},
+            )
+
+        self._in_flight += 1
+        started = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                return await run_in_threadpool(fn, *args)
+
+            self.start()
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self._in_flight -= 1
+            password_hash_duration.observe(operation, value=time.perf_counter() - started)
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE
+)
@@ -0,0 +1,336 @@
+"""
+Métricas en formato de texto de Prometheus, sin dependencias externas.
+Todas se actualizan desde el event loop; las de tipo "callback" se calculan al hacer scrape.
+"""
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Callable, Iterable
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self._values.items()
+        ]
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value: float) -> None:
+        self._values[labels] = value
+
+class CallbackGauge(_Metric):
+    """Gauge calculado al hacer scrape: callback() devuelve pares (labels, valor)."""
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        super().__init__(name, help, labelnames)
+        self._callbacks: list[Callable[[], Iterable[tuple[tuple, float]]]] = []
+
+    def add_callback(self, callback: Callable[[], Iterable[tuple[tuple, float]]]) -> None:
+        self._callbacks.append(callback)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for callback in self._callbacks
+            for labels, value in callback()
+        ]
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [cuentas por bucket..., suma, total]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, *labels, value: float) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * len(self.buckets) + [0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[index] += 1
+                break
+        state[-2] += value
+        state[-1] += 1
+
+    def samples(self) -> list[str]:
+        lines = []
+        for labels, state in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {state[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {state[-1]}")
+        return lines
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def callback_gauge(self, name: str, help: str, labelnames: tuple = ()) -> CallbackGauge:
+        return self.register(CallbackGauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header())
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# HTTP
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Latencia de las respuestas HTTP por ruta", ("method", "route", "status")
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "Requests en curso por método", ("method",)
+)
+
+# Threadpool de anyio (endpoints sync, run_in_threadpool)
+threadpool_tokens = registry.callback_gauge(
+    "threadpool_tokens", "Hilos del threadpool por estado (borrowed/total)", ("state",)
+)
+
+# Base de datos
+db_pool_connections = registry.callback_gauge(
+    "db_pool_connections", "Conexiones del pool de SQLAlchemy por estado", ("engine", "state")
+)
+db_statement_duration = registry.histogram(
+    "db_statement_duration_seconds", "Duración de cada sentencia SQL por método de repositorio",
+    ("engine", "operation"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+
+# Hashing de passwords
+password_hash_duration = registry.histogram(
+    "password_hash_duration_seconds", "Duración de hash/verify de argon2 (incluye la espera en cola)",
+    ("operation",)
+)
+password_hash_rejected = registry.counter(
+    "password_hash_rejected_total", "Operaciones de hashing rechazadas con 503 por cola llena", ("operation",)
+)
+
+# API externa
+upstream_request_duration = registry.histogram(
+    "upstream_request_duration_seconds", "Duración de las llamadas a la API externa por intento",
+    ("path", "outcome")
+)
+upstream_cache = registry.callback_gauge(
+    "upstream_cache_events", "Contadores de la caché de la API externa", ("event",)
+)
+
+# Control de admisión
+admission_state = registry.callback_gauge(
+    "admission_class_state", "Unidades en uso/límite y requests en cola/máximo por clase de admisión",
+    ("class", "state")
+)
+admission_queue_wait = registry.histogram(
+    "admission_queue_wait_seconds", "Espera en cola de los requests admitidos por clase", ("class",)
+)
+admission_rejected = registry.counter(
+    "admission_rejected_total", "Requests rechazados por clase y motivo (queue_full/queue_timeout)",
+    ("class", "reason")
+)
+
+# Feed de cambios de deudas
+debt_change_streams = registry.gauge(
+    "debt_change_streams", "Streams SSE de GET /debts/changes/stream abiertos"
+)
+debt_change_events = registry.counter(
+    "debt_change_events_total", "Cambios enviados por los streams SSE por operación", ("op",)
+)
+
+# Método de repositorio en curso: etiqueta las sentencias SQL que se ejecutan dentro
+db_operation: ContextVar[str] = ContextVar("db_operation", default="other")
+
+def _threadpool_samples():
+    from anyio import to_thread
+    try:
+        limiter = to_thread.current_default_thread_limiter()
+    except Exception:
+        return []
+    return [(("borrowed",), limiter.borrowed_tokens), (("total",), limiter.total_tokens)]
+
+threadpool_tokens.add_callback(_threadpool_samples)
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """Registra la duración de cada sentencia y expone el estado del pool del motor."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_metrics_started", None)
+        if started is not None:
+            db_statement_duration.observe(name, db_operation.get(), value=time.perf_counter() - started)
+
+    def _pool_samples():
+        pool = sync_engine.pool
+        if not hasattr(pool, "checkedout"):
+            return []
+        samples = [((name, "checked_out"), pool.checkedout())]
+        if hasattr(pool, "size"):
+            samples += [((name, "size"), pool.size()), ((name, "overflow"), max(pool.overflow(), 0))]
+        return samples
+
+    db_pool_connections.add_callback(_pool_samples)
+
+def instrument_repository(cls):
+    """
+    Decorador de clase: cada método async público etiqueta con "Clase.método"
+    las sentencias SQL que ejecuta (ver db_statement_duration).
+    """
+    for attr, fn in list(vars(cls).items()):
+        if attr.startswith("_") or not callable(fn):
+            continue
+        label = f"{cls.__name__}.{attr}"
+        if inspect.isasyncgenfunction(fn):
+            setattr(cls, attr, _label_async_generator(fn, label))
+        elif inspect.iscoroutinefunction(fn):
+            setattr(cls, attr, _label_coroutine(fn, label))
+    return cls
+
+def _label_coroutine(fn, label: str):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = db_operation.set(label)
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            db_operation.reset(token)
+    return wrapper
+
+def _label_async_generator(fn, label: str):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        # La etiqueta se fija en cada paso: entre yields el contexto es el del consumidor
+        generator = fn(*args, **kwargs)
+        try:
+            while True:
+                token = db_operation.set(label)
+                try:
+                    item = await generator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    db_operation.reset(token)
+                yield item
+        finally:
+            await generator.aclose()
+    return wrapper
+
+def _route_label(scope) -> str:
+    # El router deja la ruta resuelta en el scope: se usa su plantilla (/debts/{debt_id}),
+    # no el path concreto, para acotar la cardinalidad
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro: latencia por ruta/estado y requests en curso.
+    La ruta solo se conoce después del enrutamiento, así que el gauge de requests
+    en curso se etiqueta por método.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method)
+            http_request_duration.observe(
+                method, _route_label(scope), str(status_code), value=time.perf_counter() - started
+            )
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,59 @@
+import base64
+import json
+from typing import Awaitable, Callable, NamedTuple, Optional
+from fastapi import HTTPException, status
+
+# Los cursores son opacos para el cliente: JSON codificado en base64 url-safe
+def encode_cursor(data: dict) -> str:
+    raw = json.dumps(data, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        data = None
+
+    if not isinstance(data, dict):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+    return data
+
+class KeysetPage(NamedTuple):
+    items: list
+    # Cursor del último registro; None si no hay página siguiente
+    next_cursor: Optional[str]
+    has_more: bool
+
+async def fetch_keyset_page(
+    fetch: Callable[..., Awaitable[list]],
+    limit: int,
+    cursor: Optional[str],
+    parse_cursor: Callable[[dict], dict],
+    cursor_key: Callable[..., dict]
+) -> KeysetPage:
+    """
+    Keyset pagination común a los listados. parse_cursor convierte el cursor decodificado
+    en los argumentos "after_*" de fetch (KeyError/TypeError/ValueError => 400) y
+    cursor_key arma el cursor siguiente a partir del último registro de la página.
+    """
+    after = {}
+    if cursor is not None:
+        data = decode_cursor(cursor)
+        try:
+            after = parse_cursor(data)
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor inválido"
+            )
+
+    # Se pide un registro extra para saber si existe una página siguiente
+    rows = await fetch(limit=limit + 1, **after)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(cursor_key(rows[-1])) if has_more and rows else None
+    return KeysetPage(rows, next_cursor, has_more)
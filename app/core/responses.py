@@ -0,0 +1,28 @@
+import json
+from datetime import date, datetime
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json estándar
+    orjson = None
+
+def _default(value: Any):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """
+    Respuesta JSON para datos ya confiables (filas proyectadas a dict desde la BD).
+    Al devolver una Response, FastAPI no re-valida ni re-serializa con response_model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -4,11 +4,21 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=settings.PASSWORD_HASH_TIME_COST,
+    argon2__memory_cost=settings.PASSWORD_HASH_MEMORY_COST,
+    argon2__parallelism=settings.PASSWORD_HASH_PARALLELISM
+)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    # Devuelve un hash nuevo si el actual usa parámetros distintos a los configurados
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
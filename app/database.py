@@ -1,26 +1,119 @@
-from sqlalchemy import create_engine
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.core.metrics import instrument_engine
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
-# Crear el "motor" de SQLAlchemy
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, 
-    connect_args = { "check_same_thread": False }
+# 1. ENGINE: SQLite afinado por PRAGMAs; los parámetros salen de la configuración
+def ensure_supported_backend(url: str) -> None:
+    """
+    Las migraciones (AUTOINCREMENT, FTS5, triggers, INSERT OR IGNORE) y los upserts de los
+    repositorios solo existen en dialecto SQLite. Se valida al crear el engine, así fallan
+    igual el servidor y python -m app.migrations, antes de la primera consulta.
+    """
+    backend = make_url(url).get_backend_name()
+    if backend != "sqlite":
+        raise RuntimeError(
+            f"Motor '{backend}' no soportado: la aplicación solo soporta SQLite "
+            "(DATABASE_URL y DATABASE_REPLICA_URL deben ser sqlite+aiosqlite://...)"
+        )
+
+def _sqlite_pragmas(read_only: bool = False) -> dict:
+    if read_only:
+        # El modo de journal lo fija el primario; la réplica rechaza cualquier escritura
+        return {
+            "query_only": "ON",
+            "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+            "cache_size": -settings.SQLITE_CACHE_SIZE_KIB,
+            "mmap_size": settings.SQLITE_MMAP_SIZE_BYTES,
+            "temp_store": settings.SQLITE_TEMP_STORE,
+        }
+    return {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+        # Valor negativo = tamaño en KiB en lugar de páginas
+        "cache_size": -settings.SQLITE_CACHE_SIZE_KIB,
+        "mmap_size": settings.SQLITE_MMAP_SIZE_BYTES,
+        "temp_store": settings.SQLITE_TEMP_STORE,
+    }
+
+def _sqlite_pragma_listener(read_only: bool):
+    def apply_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in _sqlite_pragmas(read_only).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return apply_pragmas
+
+def create_engine_from_settings(url: str = SQLALCHEMY_DATABASE_URL, read_only: bool = False) -> AsyncEngine:
+    ensure_supported_backend(url)
+
+    if make_url(url).database in (None, "", ":memory:"):
+        # En memoria no hay archivo que compartir: pool estático, sin WAL ni mmap
+        return create_async_engine(url, echo=settings.DATABASE_ECHO, connect_args={"check_same_thread": False})
+
+    # aiosqlite usa una conexión por hilo; el pool reparte varias entre las tareas
+    engine = create_async_engine(
+        url,
+        echo=settings.DATABASE_ECHO,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        connect_args={"check_same_thread": False},
+    )
+    event.listen(engine.sync_engine, "connect", _sqlite_pragma_listener(read_only))
+    return engine
+
+async def engine_report(engine: AsyncEngine, read_only: bool = False) -> dict:
+    """Resumen del engine activo; lee los PRAGMAs de una conexión real."""
+    report = {
+        "role": "replica" if read_only else "primary",
+        "url": engine.url.render_as_string(hide_password=True),
+        "pool": type(engine.pool).__name__,
+    }
+    if hasattr(engine.pool, "size"):
+        report["pool_size"] = engine.pool.size()
+        report["max_overflow"] = settings.DB_MAX_OVERFLOW
+
+    async with engine.connect() as conn:
+        report["pragmas"] = {
+            name: (await conn.exec_driver_sql(f"PRAGMA {name}")).scalar()
+            for name in _sqlite_pragmas(read_only)
+        }
+
+    return report
+
+# Crear el "motor" asíncrono de SQLAlchemy (primario) y, si hay réplica, el de lectura
+engine = create_engine_from_settings()
+read_engine = (
+    create_engine_from_settings(settings.DATABASE_REPLICA_URL, read_only=True)
+    if settings.DATABASE_REPLICA_URL else engine
 )
+instrument_engine(engine, "primary")
+if read_engine is not engine:
+    instrument_engine(read_engine, "replica")
 
-# 2. SESSION: Crea sesiones para hacer operaciones en la BD
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# 2. SESSION: Crea sesiones asíncronas para hacer operaciones en la BD
+# expire_on_commit=False evita recargas implícitas (lazy) después del commit
+SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+# Sesiones de solo lectura: van a la réplica (o al primario si no hay una configurada)
+ReadSessionLocal = async_sessionmaker(bind=read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 
 # 3. BASE: Clase base para todos los modelos
 Base = declarative_base()
 
 # 4. DEPENDENCY: Función que FastAPI usará para obtener la sesión
-# Esta función se ejecuta en cada request. Abre una sesión, la usa, y la cierra al terminar
-def get_db():
-    db = SessionLocal()
-    try:
+# Esta función se ejecuta en cada request. Abre una sesión, la usa, y la cierra al terminar.
+# Las rutas que escriben usan get_db: todas sus lecturas (incluidas las posteriores a la
+# escritura) quedan en el primario. Las rutas de solo lectura declaran get_read_db.
+async def get_db():
+    async with SessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    async with ReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
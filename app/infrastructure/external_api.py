@@ -1,46 +1,139 @@
+import asyncio
+import time
+from typing import Optional
 from fastapi import HTTPException
 import httpx
+from app.core.config import settings
+from app.core.metrics import upstream_cache, upstream_request_duration
+from app.infrastructure.response_cache import ResponseCache
+
+# Respuestas del upstream que vale la pena reintentar
+RETRYABLE_STATUS_CODES = {502, 503, 504}
 
 class ExternalApiClient:
 
-    def __init__(self):
-        self.base_url = 'https://jsonplaceholder.typicode.com'
+    def __init__(self, base_url: Optional[str] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.base_url = base_url or settings.EXTERNAL_API_BASE_URL
+        self.retries = settings.EXTERNAL_API_RETRIES
+        self.backoff = settings.EXTERNAL_API_RETRY_BACKOFF_SECONDS
+        # transport permite inyectar un stub local (p. ej. httpx.MockTransport) en pruebas
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self):
+        # Un único cliente por proceso: reutiliza conexiones (keep-alive, TLS, DNS)
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=settings.EXTERNAL_API_HTTP2,
+                transport=self._transport,
+                timeout=httpx.Timeout(
+                    settings.EXTERNAL_API_TIMEOUT_SECONDS,
+                    connect=settings.EXTERNAL_API_CONNECT_TIMEOUT_SECONDS
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.EXTERNAL_API_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.EXTERNAL_API_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.EXTERNAL_API_KEEPALIVE_EXPIRY_SECONDS
+                )
+            )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def get_all_posts(self):
-        async with httpx.AsyncClient() as client:
-            try:
-                
-                response = await client.get(f'{self.base_url}/posts', timeout=10.0);
+        return await self._get('/posts', '/posts')
 
-                if response.status_code != 200:
-                    raise HTTPException(
-                        status_code=response.status_code,
-                        detail=response.text
-                    )
-            
-                return response.json()
-            
-            except httpx.TimeoutException:
-                raise HTTPException(status_code=504, detail="Timeout")
-            except Exception as e:
-                raise HTTPException(status_code=500, detail=str(e))
-            
     async def get_post_by_id(self, post_id: int):
-        async with httpx.AsyncClient() as client:
+        return await self._get(f'/posts/{post_id}', '/posts/{post_id}')
+
+    async def _get(self, path: str, route: str):
+        # route es la plantilla del path: etiqueta de métricas con cardinalidad acotada
+        # Fuera del lifespan (scripts, pruebas) el cliente se crea bajo demanda
+        if self._client is None:
+            await self.start()
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
             try:
-                response = await client.get(f'{self.base_url}/posts/{post_id}', timeout=10.0);
+                response = await self._client.get(path)
+                upstream_request_duration.observe(route, str(response.status_code), value=time.perf_counter() - started)
+
+                if response.status_code in RETRYABLE_STATUS_CODES and attempt < self.retries:
+                    attempt += 1
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                    continue
+
                 if response.status_code != 200:
                     raise HTTPException(
                         status_code=response.status_code,
                         detail=response.text
                     )
-                
+
                 return response.json()
-            
-            except httpx.TimeoutException:
-                raise HTTPException(status_code=504, detail="Timeout")
+
+            except HTTPException:
+                raise
+            except httpx.TransportError as e:
+                outcome = "timeout" if isinstance(e, httpx.TimeoutException) else "error"
+                upstream_request_duration.observe(route, outcome, value=time.perf_counter() - started)
+                if attempt < self.retries:
+                    attempt += 1
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                    continue
+                if isinstance(e, httpx.TimeoutException):
+                    raise HTTPException(status_code=504, detail="Timeout")
+                raise HTTPException(status_code=500, detail=str(e))
             except Exception as e:
                 raise HTTPException(status_code=500, detail=str(e))
-        
-            
-external_api_client = ExternalApiClient()
\ No newline at end of file
+
+
+class CachedExternalApiClient:
+    """Caché delante de ExternalApiClient (TTL, stale-while-revalidate y single-flight)."""
+
+    POSTS_KEY = 'posts'
+
+    def __init__(self, client: ExternalApiClient, cache: ResponseCache):
+        self.client = client
+        self.cache = cache
+        self.listing_hits = 0
+
+    async def get_all_posts(self):
+        return await self.cache.get_or_load(self.POSTS_KEY, self.client.get_all_posts)
+
+    async def get_post_by_id(self, post_id: int):
+        # Si el listado completo está en caché, el post se sirve desde ahí
+        posts = self.cache.peek(self.POSTS_KEY)
+        if posts is not None:
+            for post in posts:
+                if post.get('id') == post_id:
+                    self.listing_hits += 1
+                    return post
+
+        return await self.cache.get_or_load(
+            f'{self.POSTS_KEY}/{post_id}',
+            lambda: self.client.get_post_by_id(post_id)
+        )
+
+    def stats(self) -> dict:
+        return {**self.cache.stats(), "listing_hits": self.listing_hits}
+
+    async def close(self):
+        await self.cache.close()
+
+
+external_api_client = ExternalApiClient()
+
+cached_external_api_client = CachedExternalApiClient(
+    external_api_client,
+    ResponseCache(
+        ttl_seconds=settings.EXTERNAL_API_CACHE_TTL_SECONDS,
+        stale_seconds=settings.EXTERNAL_API_CACHE_STALE_SECONDS,
+        max_entries=settings.EXTERNAL_API_CACHE_MAX_ENTRIES
+    )
+)
+
+upstream_cache.add_callback(lambda: [((event,), value) for event, value in cached_external_api_client.stats().items()])
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+Loader = Callable[[], Awaitable[Any]]
+
+class ResponseCache:
+    """
+    Caché en memoria para respuestas de servicios externos:
+    - TTL con stale-while-revalidate: un valor vencido se sigue sirviendo durante
+      `stale_seconds` mientras se refresca en segundo plano.
+    - Tamaño acotado (LRU por número de entradas).
+    - Single-flight: N misses concurrentes de la misma clave hacen una sola llamada.
+    Los errores del loader no se guardan en caché.
+    """
+
+    def __init__(self, ttl_seconds: float, stale_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[Any, float, float]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "load_errors": 0,
+            "evictions": 0,
+        }
+
+    def stats(self) -> dict:
+        return {**self._counters, "size": len(self._entries), "inflight": len(self._inflight)}
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Devuelve el valor solo si está fresco, sin tocar contadores ni disparar cargas."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[1]:
+            return None
+        return entry[0]
+
+    async def get_or_load(self, key: str, loader: Loader) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                self._counters["hits"] += 1
+                self._entries.move_to_end(key)
+                return value
+            if now < stale_until:
+                self._counters["stale_hits"] += 1
+                self._entries.move_to_end(key)
+                if key not in self._inflight:
+                    self._start_load(key, loader)
+                return value
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._counters["coalesced"] += 1
+        else:
+            self._counters["misses"] += 1
+            task = self._start_load(key, loader)
+
+        # shield: si un request se cancela, la carga sigue para los demás que esperan
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def close(self) -> None:
+        for task in list(self._inflight.values()):
+            task.cancel()
+        self._inflight.clear()
+
+    def _start_load(self, key: str, loader: Loader) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, loader))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish_load(key, done))
+        return task
+
+    async def _load(self, key: str, loader: Loader) -> Any:
+        value = await loader()
+        now = time.monotonic()
+        self._entries[key] = (value, now + self.ttl_seconds, now + self.ttl_seconds + self.stale_seconds)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._counters["evictions"] += 1
+        return value
+
+    def _finish_load(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Marca la excepción como leída (p. ej. refrescos en segundo plano sin nadie esperando)
+        if not task.cancelled() and task.exception() is not None:
+            self._counters["load_errors"] += 1
@@ -1,15 +1,37 @@
 # app/main.py
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.database import engine, Base
-from app.routers import auth_router, debt_router, user_router
+from app.core.admission import AdmissionMiddleware
+from app.core.hashing import password_hasher
+from app.database import engine, engine_report, read_engine
+from app.infrastructure.external_api import cached_external_api_client, external_api_client
+from app.core.metrics import MetricsMiddleware
+from app.routers import auth_router, debt_router, metrics_router, user_router
 from fastapi.middleware.cors import CORSMiddleware
 
-# Crear las tablas en la base de datos
-# Esto ejecuta el CREATE TABLE si la tabla no existe
-Base.metadata.create_all(bind=engine)
+# El esquema lo gestionan las migraciones (python -m app.migrations upgrade),
+# que se ejecutan una vez por despliegue y no al arrancar cada worker
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("Base de datos: %s", await engine_report(engine))
+    if read_engine is not engine:
+        logger.info("Réplica de lectura: %s", await engine_report(read_engine, read_only=True))
+    password_hasher.start()
+    await external_api_client.start()
+    yield
+    await cached_external_api_client.close()
+    await external_api_client.close()
+    password_hasher.shutdown()
+    if read_engine is not engine:
+        await read_engine.dispose()
+    await engine.dispose()
 
 # Crear la aplicación FastAPI
 app = FastAPI(
+    lifespan=lifespan,
     title="CRUD API con FastAPI",
     description="API RESTful con arquitectura en capas",
     version="1.0.0",
@@ -17,6 +39,13 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+# Límite de concurrencia por clase de ruta; va por dentro de MetricsMiddleware
+# para que los rechazos (503/429) también se midan
+app.add_middleware(AdmissionMiddleware)
+
+# Latencia y requests en curso por ruta (expuestas en GET /metrics)
+app.add_middleware(MetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:8100"],
@@ -30,6 +59,7 @@ app.add_middleware(
 app.include_router(user_router.router)
 app.include_router(debt_router.router)
 app.include_router(auth_router.router);
+app.include_router(metrics_router.router)
 
 # Endpoint raíz (opcional)
 @app.get("/")
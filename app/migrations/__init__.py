@@ -0,0 +1,4 @@
+from app.migrations.runner import pending_migrations, upgrade
+from app.migrations.versions import MIGRATIONS, Migration
+
+__all__ = ["MIGRATIONS", "Migration", "pending_migrations", "upgrade"]
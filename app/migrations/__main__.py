@@ -0,0 +1,66 @@
+"""
+Uso (una vez por despliegue, antes de arrancar los workers):
+
+    python -m app.migrations upgrade      # aplica migraciones pendientes
+    python -m app.migrations status       # lista migraciones pendientes
+    python -m app.migrations check        # EXPLAIN QUERY PLAN y round-trips de los repositorios
+                                          # (incluye cada combinación de filtros de /debts/filter)
+"""
+import argparse
+import asyncio
+import sys
+from app.database import engine
+from app.migrations.query_plan import ALLOW_FULL_SCAN, explain_repository_queries, offending, too_many_round_trips
+from app.migrations.runner import pending_migrations, upgrade
+
+async def _main(args: argparse.Namespace) -> int:
+    try:
+        if args.command == "upgrade":
+            applied = await upgrade(target=args.target)
+            for migration in applied:
+                print(f"aplicada {migration.version}: {migration.name}")
+            if not applied:
+                print("sin migraciones pendientes")
+            return 0
+
+        if args.command == "status":
+            pending = await pending_migrations()
+            for migration in pending:
+                print(f"pendiente {migration.version}: {migration.name}")
+            if not pending:
+                print("base de datos al día")
+            return 0
+
+        reports = await explain_repository_queries()
+        for report in reports:
+            flag = "FULL SCAN" if report["full_scan"] else "ok"
+            if report["full_scan"] and report["allowed"]:
+                flag = "full scan (permitido)"
+            if report["unindexed_sort"]:
+                flag = "ORDEN SIN ÍNDICE"
+            if too_many_round_trips(report):
+                flag = f"{report['statements']} SENTENCIAS"
+            print(f"[{flag}] {report['query']}")
+            if report["full_scan"] and report["allowed"]:
+                print(f"    motivo: {ALLOW_FULL_SCAN[report['query']]}")
+            for detail in report["plan"]:
+                print(f"    {detail}")
+        bad = offending(reports)
+        if bad:
+            print(f"{len(bad)} consulta(s) con full scan, orden sin índice o más de un round-trip", file=sys.stderr)
+            return 1
+        return 0
+    finally:
+        await engine.dispose()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = subparsers.add_parser("upgrade", help="aplica migraciones pendientes")
+    upgrade_parser.add_argument("--target", type=int, default=None, help="versión máxima a aplicar")
+    subparsers.add_parser("status", help="lista migraciones pendientes")
+    subparsers.add_parser("check", help="revisa planes de consulta de los repositorios")
+    sys.exit(asyncio.run(_main(parser.parse_args())))
+
+if __name__ == "__main__":
+    main()
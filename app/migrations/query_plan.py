@@ -0,0 +1,173 @@
+import inspect
+import re
+from datetime import date
+from itertools import product
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from app.database import engine as default_engine
+from app.repositories.debt_repository import DebtRepository, filter_sort, unsupported_filter_reason
+from app.repositories.user_repository import UserRepository
+from app.repositories.version_repository import VersionRepository
+from app.schemas.debt_schema import DebtFilter
+
+# Consultas de los repositorios que se revisan con EXPLAIN QUERY PLAN.
+# (etiqueta, repositorio, método, argumentos)
+PROBES = [
+    ("UserRepository.get_all", UserRepository, "get_all", {}),
+    ("UserRepository.get_page", UserRepository, "get_page", {"after_id": 1}),
+    ("UserRepository.get_by_id", UserRepository, "get_by_id", {"user_id": 1}),
+    ("UserRepository.get_by_email", UserRepository, "get_by_email", {"email": "check@example.com"}),
+    ("UserRepository.get_active_users", UserRepository, "get_active_users", {}),
+    ("UserRepository.get_existing_ids", UserRepository, "get_existing_ids", {"user_ids": {1, 2, 3}}),
+    ("DebtRepository.get_all", DebtRepository, "get_all", {}),
+    ("DebtRepository.get_page[id]", DebtRepository, "get_page", {"after_id": 1}),
+    ("DebtRepository.get_page[date]", DebtRepository, "get_page", {"after_id": 1, "after_date": date(2024, 1, 1), "order_by": "date"}),
+    ("DebtRepository.get_by_id", DebtRepository, "get_by_id", {"debt_id": 1}),
+    ("DebtRepository.get_with_user", DebtRepository, "get_with_user", {"debt_id": 1}),
+    ("DebtRepository.get_by_user_id", DebtRepository, "get_by_user_id", {"user_id": 1}),
+    ("DebtRepository.get_unpaid_by_user", DebtRepository, "get_unpaid_by_user", {"user_id": 1}),
+    ("DebtRepository.get_summary", DebtRepository, "get_summary", {"user_id": 1}),
+    ("DebtRepository.get_leaderboard", DebtRepository, "get_leaderboard", {}),
+    ("DebtRepository.compute_summary", DebtRepository, "compute_summary", {"user_id": 1}),
+    ("DebtRepository.compute_leaderboard", DebtRepository, "compute_leaderboard", {}),
+    ("DebtRepository.search", DebtRepository, "search", {"terms": ["check"]}),
+    ("DebtRepository.search[user]", DebtRepository, "search", {"terms": ["check*"], "user_id": 1, "status": False, "after_rank": -1.0, "after_id": 1}),
+    ("DebtRepository.get_changes", DebtRepository, "get_changes", {"after_id": 1}),
+    ("DebtRepository.get_changes[user]", DebtRepository, "get_changes", {"after_id": 1, "user_id": 1}),
+    ("DebtRepository.get_last_change_id", DebtRepository, "get_last_change_id", {}),
+    ("VersionRepository.get_user_version", VersionRepository, "get_user_version", {"user_id": 1}),
+    ("VersionRepository.get_debts_version", VersionRepository, "get_debts_version", {"user_id": 1}),
+]
+
+# DebtRepository.filter: todas las combinaciones que acepta unsupported_filter_reason,
+# sin y con cursor. Sin user_id, además del full scan se rechaza ordenar en un B-tree temporal
+# (el orden debe salir del índice para cortar en el LIMIT)
+FILTER_SORTS = (None, "date", "-date", "value", "-value", "id", "-id")
+FILTER_CURSOR_KEYS = {"date": date(2024, 1, 1), "value": 1.0, "id": 1}
+
+def _filter_probes() -> tuple[list, set]:
+    probes, indexed_sort_required = [], set()
+    for user, paid, dates, values, sort in product((False, True), (False, True), (False, True), (False, True), FILTER_SORTS):
+        filters = DebtFilter(
+            user_id=1 if user else None,
+            status=False if paid else None,
+            date_from=date(2024, 1, 1) if dates else None,
+            date_to=date(2024, 12, 31) if dates else None,
+            min_value=10.0 if values else None,
+            max_value=100.0 if values else None,
+            sort=sort,
+        )
+        if unsupported_filter_reason(filters) is not None:
+            continue
+
+        parts = [name for name, used in (("user_id", user), ("status", paid), ("date", dates), ("value", values)) if used]
+        label = f"DebtRepository.filter[{','.join(parts)};sort={filter_sort(filters)}]"
+        column = filter_sort(filters).lstrip("-")
+        for cursor in (False, True):
+            kwargs = {"filters": filters}
+            if cursor:
+                kwargs.update(after_key=FILTER_CURSOR_KEYS[column], after_id=1)
+            probe_label = label + ("+cursor" if cursor else "")
+            probes.append((probe_label, DebtRepository, "filter", kwargs))
+            if not user:
+                indexed_sort_required.add(probe_label)
+    return probes, indexed_sort_required
+
+FILTER_PROBES, REQUIRE_INDEXED_SORT = _filter_probes()
+PROBES += FILTER_PROBES
+
+# DebtRepository.stream_rows (GET /debts/export): cada combinación de filtros. El orden debe
+# salir de un índice, si no el primer byte espera a que se ordene todo el resultado
+def _export_probes() -> list:
+    probes = []
+    for user, paid, dates in product((False, True), (False, True), (False, True)):
+        kwargs = {"batch_size": 10}
+        if user:
+            kwargs["user_id"] = 1
+        if paid:
+            kwargs["status"] = False
+        if dates:
+            kwargs.update(date_from=date(2024, 1, 1), date_to=date(2024, 12, 31))
+        parts = [name for name, used in (("user_id", user), ("status", paid), ("date", dates)) if used]
+        probes.append((f"DebtRepository.stream_rows[{','.join(parts)}]", DebtRepository, "stream_rows", kwargs))
+    return probes
+
+EXPORT_PROBES = _export_probes()
+PROBES += EXPORT_PROBES
+REQUIRE_INDEXED_SORT |= {label for label, *_ in EXPORT_PROBES}
+
+# Consultas que recorren una tabla (o un índice completo) a propósito, con el motivo
+ALLOW_FULL_SCAN = {
+    "UserRepository.get_all": "listado completo",
+    "UserRepository.get_active_users": "listado completo (is_active no es selectivo)",
+    "DebtRepository.get_all": "listado completo",
+    "DebtRepository.stream_rows[]": "exportación completa, en orden de id",
+    "DebtRepository.stream_rows[status]": "exportación por estado: status no es selectivo, se recorre en orden de id",
+    "DebtRepository.compute_leaderboard": (
+        "ranking en vivo (?live=true): agrega todas las deudas por usuario y ordena el resultado "
+        "en un B-tree temporal; el ranking normal lee debt_summaries por índice"
+    ),
+}
+
+# Cada consulta de lectura debe resolverse en un solo round-trip a la BD
+MAX_STATEMENTS_PER_QUERY = 1
+
+# "SCAN debts" (o "SCAN TABLE debts" en SQLite < 3.36) es un full scan; recorrer un índice
+# completo ("SCAN debts USING INDEX ...") también lee todas las filas
+_FULL_SCAN = re.compile(r"^SCAN (TABLE )?\w+( USING (COVERING )?INDEX \w+)?$")
+_TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+def is_full_scan(detail: str) -> bool:
+    return bool(_FULL_SCAN.match(detail.strip()))
+
+async def explain_repository_queries(engine: AsyncEngine = default_engine) -> list[dict]:
+    """Ejecuta cada probe, captura su SQL y devuelve el plan de cada sentencia."""
+    captured: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, tuple(parameters or ())))
+
+    reports = []
+    async with AsyncSession(bind=engine) as db:
+        for label, repository_class, method, kwargs in PROBES:
+            captured.clear()
+            event.listen(engine.sync_engine, "before_cursor_execute", capture)
+            try:
+                result = getattr(repository_class(db), method)(**kwargs)
+                if inspect.isasyncgen(result):
+                    # Lecturas en streaming: se consumen para que lleguen a ejecutar la consulta
+                    async for _ in result:
+                        pass
+                else:
+                    await result
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+            conn = await db.connection()
+            statements = list(captured)
+            for statement, parameters in statements:
+                if not statement.lstrip().upper().startswith("SELECT"):
+                    continue
+                rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+                plan = [row[-1] for row in rows]
+                full_scan = any(is_full_scan(detail) for detail in plan)
+                reports.append({
+                    "query": label,
+                    "sql": " ".join(statement.split()),
+                    "plan": plan,
+                    "full_scan": full_scan,
+                    "allowed": label in ALLOW_FULL_SCAN,
+                    "unindexed_sort": label in REQUIRE_INDEXED_SORT and any(_TEMP_SORT in detail for detail in plan),
+                    "statements": len(statements),
+                })
+        await db.rollback()
+    return reports
+
+def too_many_round_trips(report: dict) -> bool:
+    return report["statements"] > MAX_STATEMENTS_PER_QUERY
+
+def offending(reports: list[dict]) -> list[dict]:
+    return [
+        report for report in reports
+        if (report["full_scan"] and not report["allowed"]) or report["unindexed_sort"] or too_many_round_trips(report)
+    ]
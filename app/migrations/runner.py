@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.database import engine as default_engine
+from app.migrations.versions import MIGRATIONS, Migration
+
+SCHEMA_TABLE = "schema_migrations"
+
+def _ensure_version_table(conn: Connection) -> None:
+    conn.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} ("
+        "version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at VARCHAR NOT NULL)"
+    )
+    conn.commit()
+
+def _applied_versions(conn: Connection) -> set[int]:
+    _ensure_version_table(conn)
+    rows = conn.exec_driver_sql(f"SELECT version FROM {SCHEMA_TABLE}").all()
+    return {row[0] for row in rows}
+
+def _pending(conn: Connection, target: Optional[int] = None) -> list[Migration]:
+    applied = _applied_versions(conn)
+    return [
+        migration for migration in sorted(MIGRATIONS, key=lambda m: m.version)
+        if migration.version not in applied and (target is None or migration.version <= target)
+    ]
+
+def _upgrade(conn: Connection, target: Optional[int] = None) -> list[Migration]:
+    applied = []
+    for migration in _pending(conn, target):
+        for statement in migration.statements:
+            conn.exec_driver_sql(statement)
+        conn.exec_driver_sql(
+            f"INSERT INTO {SCHEMA_TABLE} (version, name, applied_at) VALUES (?, ?, ?)",
+            (migration.version, migration.name, datetime.utcnow().isoformat()),
+        )
+        # Commit por migración: si una falla, las anteriores quedan registradas
+        conn.commit()
+        applied.append(migration)
+    return applied
+
+async def pending_migrations(engine: AsyncEngine = default_engine) -> list[Migration]:
+    async with engine.connect() as conn:
+        return await conn.run_sync(_pending)
+
+async def upgrade(engine: AsyncEngine = default_engine, target: Optional[int] = None) -> list[Migration]:
+    """Aplica las migraciones pendientes. Se ejecuta una vez por despliegue, no por worker."""
+    async with engine.connect() as conn:
+        return await conn.run_sync(_upgrade, target)
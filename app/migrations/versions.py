@@ -0,0 +1,174 @@
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: tuple[str, ...]
+
+# Migraciones versionadas. Nunca editar una ya publicada: agregar una nueva al final.
+# Las sentencias usan IF NOT EXISTS para adoptar bases creadas antes con create_all.
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        name="esquema inicial (users, debts)",
+        statements=(
+            """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER NOT NULL,
+                email VARCHAR NOT NULL,
+                nombre VARCHAR NOT NULL,
+                apellido VARCHAR NOT NULL,
+                password VARCHAR NOT NULL,
+                is_active BOOLEAN,
+                PRIMARY KEY (id)
+            )
+            """,
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+            "CREATE INDEX IF NOT EXISTS ix_users_id ON users (id)",
+            """
+            CREATE TABLE IF NOT EXISTS debts (
+                id INTEGER NOT NULL,
+                description VARCHAR NOT NULL,
+                value FLOAT NOT NULL,
+                date DATE NOT NULL,
+                status BOOLEAN,
+                user_id INTEGER NOT NULL,
+                PRIMARY KEY (id),
+                FOREIGN KEY(user_id) REFERENCES users (id)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS ix_debts_id ON debts (id)",
+        ),
+    ),
+    Migration(
+        version=2,
+        name="índices de rendimiento para debts",
+        statements=(
+            "CREATE INDEX IF NOT EXISTS ix_debts_user_id_status ON debts (user_id, status)",
+            "CREATE INDEX IF NOT EXISTS ix_debts_user_id_date ON debts (user_id, date)",
+            "CREATE INDEX IF NOT EXISTS ix_debts_date_id ON debts (date, id)",
+            "ANALYZE",
+        ),
+    ),
+    Migration(
+        version=3,
+        name="resumen de deudas por usuario (debt_summaries)",
+        statements=(
+            """
+            CREATE TABLE IF NOT EXISTS debt_summaries (
+                user_id INTEGER NOT NULL,
+                total FLOAT NOT NULL,
+                unpaid_total FLOAT NOT NULL,
+                debt_count INTEGER NOT NULL,
+                unpaid_count INTEGER NOT NULL,
+                oldest_unpaid_date DATE,
+                PRIMARY KEY (user_id),
+                FOREIGN KEY(user_id) REFERENCES users (id)
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS ix_debt_summaries_unpaid_total ON debt_summaries (unpaid_total)",
+            # (user_id, status, date) cubre las búsquedas de (user_id, status) y el MIN(date) de impagas
+            "CREATE INDEX IF NOT EXISTS ix_debts_user_id_status_date ON debts (user_id, status, date)",
+            "DROP INDEX IF EXISTS ix_debts_user_id_status",
+            """
+            INSERT OR REPLACE INTO debt_summaries
+                (user_id, total, unpaid_total, debt_count, unpaid_count, oldest_unpaid_date)
+            SELECT
+                user_id,
+                SUM(value),
+                COALESCE(SUM(CASE WHEN status = 0 THEN value END), 0),
+                COUNT(*),
+                SUM(CASE WHEN status = 0 THEN 1 ELSE 0 END),
+                MIN(CASE WHEN status = 0 THEN date END)
+            FROM debts
+            GROUP BY user_id
+            """,
+        ),
+    ),
+    Migration(
+        version=4,
+        name="versiones por usuario para ETags (user_versions)",
+        statements=(
+            """
+            CREATE TABLE IF NOT EXISTS user_versions (
+                user_id INTEGER NOT NULL,
+                user_version INTEGER NOT NULL,
+                debts_version INTEGER NOT NULL,
+                PRIMARY KEY (user_id)
+            )
+            """,
+            "INSERT OR IGNORE INTO user_versions (user_id, user_version, debts_version) SELECT id, 1, 1 FROM users",
+        ),
+    ),
+    Migration(
+        version=5,
+        name="registro de cambios de deudas para sincronización incremental (debt_changes)",
+        statements=(
+            # AUTOINCREMENT: los ids nunca se reutilizan, así un cursor no puede saltarse cambios
+            """
+            CREATE TABLE IF NOT EXISTS debt_changes (
+                id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+                op VARCHAR NOT NULL,
+                debt_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                description VARCHAR,
+                value FLOAT,
+                date DATE,
+                status BOOLEAN,
+                changed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS ix_debt_changes_user_id_id ON debt_changes (user_id, id)",
+        ),
+    ),
+    Migration(
+        version=6,
+        name="búsqueda de texto completo sobre debts.description (FTS5)",
+        statements=(
+            # Contentless: el índice no duplica las descripciones. owner ("u<user_id>") permite
+            # filtrar por usuario dentro del propio MATCH, intersectando posting lists
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS debts_fts USING fts5(
+                description,
+                owner,
+                content='',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS debts_fts_insert AFTER INSERT ON debts BEGIN
+                INSERT INTO debts_fts (rowid, description, owner)
+                VALUES (new.id, new.description, 'u' || new.user_id);
+            END
+            """,
+            # En una tabla contentless, borrar exige los valores indexados originales
+            """
+            CREATE TRIGGER IF NOT EXISTS debts_fts_delete AFTER DELETE ON debts BEGIN
+                INSERT INTO debts_fts (debts_fts, rowid, description, owner)
+                VALUES ('delete', old.id, old.description, 'u' || old.user_id);
+            END
+            """,
+            # Solo si cambian columnas indexadas: marcar como pagada no toca el índice
+            """
+            CREATE TRIGGER IF NOT EXISTS debts_fts_update AFTER UPDATE OF description, user_id ON debts BEGIN
+                INSERT INTO debts_fts (debts_fts, rowid, description, owner)
+                VALUES ('delete', old.id, old.description, 'u' || old.user_id);
+                INSERT INTO debts_fts (rowid, description, owner)
+                VALUES (new.id, new.description, 'u' || new.user_id);
+            END
+            """,
+            "INSERT INTO debts_fts (rowid, description, owner) SELECT id, description, 'u' || user_id FROM debts",
+            "INSERT INTO debts_fts (debts_fts) VALUES ('optimize')",
+        ),
+    ),
+    Migration(
+        version=7,
+        name="índice por valor para filtros y orden de GET /debts/filter",
+        statements=(
+            "CREATE INDEX IF NOT EXISTS ix_debts_value_id ON debts (value, id)",
+            "ANALYZE",
+        ),
+    ),
+]
@@ -1,4 +1,7 @@
 from app.models.user_model import User
 from app.models.debt_model import Debt
+from app.models.debt_summary_model import DebtSummary
+from app.models.user_version_model import UserVersion
+from app.models.debt_change_model import DebtChange
 
-__all__ = ["User", "Debt"]
\ No newline at end of file
+__all__ = ["User", "Debt", "DebtSummary", "UserVersion", "DebtChange"]
\ No newline at end of file
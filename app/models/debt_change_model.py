@@ -0,0 +1,27 @@
+from sqlalchemy import Boolean, Column, Date, DateTime, Float, Index, Integer, String, func
+from app.database import Base
+
+
+class DebtChange(Base):
+    # Registro append-only de escrituras sobre debts (feed de GET /debts/changes).
+    # DebtRepository inserta en la misma transacción de cada escritura; id es el cursor.
+    # En los tombstones (op="delete") las columnas de la deuda quedan en NULL.
+    # Sin FK: los cambios sobreviven al borrado de la deuda y del usuario.
+    __tablename__ = "debt_changes"
+    __table_args__ = (
+        Index("ix_debt_changes_user_id_id", "user_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    op = Column(String, nullable=False)
+    debt_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    description = Column(String)
+    value = Column(Float)
+    date = Column(Date)
+    status = Column(Boolean)
+    changed_at = Column(DateTime, nullable=False, server_default=func.current_timestamp())
+
+    def __repr__(self):
+        return f"<DebtChange(id={self.id}, op={self.op}, debt_id={self.debt_id})>"
@@ -1,10 +1,17 @@
-from sqlalchemy import Boolean, Column, Date, Float, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, Date, Float, ForeignKey, Index, Integer, String
 from app.database import Base
 from sqlalchemy.orm import relationship
 
 
 class Debt(Base):
     __tablename__ = "debts"
+    __table_args__ = (
+        # Índices creados por las migraciones 2, 3 y 7 (ver app/migrations/versions.py)
+        Index("ix_debts_user_id_status_date", "user_id", "status", "date"),
+        Index("ix_debts_user_id_date", "user_id", "date"),
+        Index("ix_debts_date_id", "date", "id"),
+        Index("ix_debts_value_id", "value", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     description = Column(String, nullable=False)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Date, Float, ForeignKey, Integer
+from app.database import Base
+
+
+class DebtSummary(Base):
+    # Resumen por usuario mantenido por DebtRepository en la misma transacción de cada escritura
+    __tablename__ = "debt_summaries"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    unpaid_total = Column(Float, nullable=False, default=0.0, index=True)
+    debt_count = Column(Integer, nullable=False, default=0)
+    unpaid_count = Column(Integer, nullable=False, default=0)
+    oldest_unpaid_date = Column(Date, nullable=True)
+
+    def __repr__(self):
+        return f"<DebtSummary(user_id={self.user_id}, total={self.total}, unpaid_total={self.unpaid_total})>"
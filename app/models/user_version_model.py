@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer
+from app.database import Base
+
+
+class UserVersion(Base):
+    # Contadores por usuario que alimentan los ETags: UserRepository sube user_version y
+    # DebtRepository sube debts_version en la misma transacción de cada escritura.
+    # Sin FK a users: la fila sobrevive al borrado para que un ID reutilizado no repita versiones.
+    __tablename__ = "user_versions"
+
+    user_id = Column(Integer, primary_key=True)
+    user_version = Column(Integer, nullable=False, default=0)
+    debts_version = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<UserVersion(user_id={self.user_id}, user_version={self.user_version}, debts_version={self.debts_version})>"
@@ -1,4 +1,5 @@
 from app.repositories.user_repository import UserRepository
 from app.repositories.debt_repository import DebtRepository
+from app.repositories.version_repository import VersionRepository
 
-__all__ = ["UserRepository", "DebtRepository"]
\ No newline at end of file
+__all__ = ["UserRepository", "DebtRepository", "VersionRepository"]
\ No newline at end of file
@@ -1,65 +1,626 @@
-from sqlalchemy.orm import Session
-from typing import Optional
+from sqlalchemy import Integer, Row, and_, bindparam, case, column, delete, func, insert, literal, literal_column, select, table, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Optional
+from datetime import date
+from app.core.change_notifier import debt_change_notifier
+from app.core.metrics import instrument_repository
+from app.models.debt_change_model import DebtChange
 from app.models.debt_model import Debt
-from app.schemas.debt_schema import CreateDebt, UpdateDebt
+from app.models.debt_summary_model import DebtSummary
+from app.models.user_model import User
+from app.repositories.version_repository import VersionRepository
+from app.schemas.debt_schema import CreateDebt, DebtFilter, UpdateDebt
 
+summaries = DebtSummary.__table__
+debt_changes = DebtChange.__table__
+
+# Columnas de los listados: se devuelven filas livianas en lugar de entidades ORM
+DEBT_COLUMNS = (Debt.id, Debt.description, Debt.value, Debt.date, Debt.status, Debt.user_id)
+
+# Columnas de orden de DebtRepository.filter; cada una tiene un índice (col, id)
+SORT_COLUMNS = {"date": Debt.date, "value": Debt.value, "id": Debt.id}
+
+def filter_sort(filters: DebtFilter) -> str:
+    if filters.sort is not None:
+        return filters.sort
+    if filters.min_value is not None or filters.max_value is not None:
+        if filters.date_from is None and filters.date_to is None:
+            return "value"
+    return "date"
+
+def unsupported_filter_reason(filters: DebtFilter) -> Optional[str]:
+    """
+    Combinaciones que el motor no puede resolver con un índice. Con user_id se busca por
+    (user_id, ...) y el orden se aplica solo sobre las deudas del usuario. Sin user_id hace
+    falta un rango sobre date o value y ordenar por esa misma columna, para recorrer
+    ix_debts_date_id o ix_debts_value_id en orden y cortar en el LIMIT.
+    """
+    if filters.user_id is not None:
+        return None
+
+    ranges = []
+    if filters.date_from is not None or filters.date_to is not None:
+        ranges.append("date")
+    if filters.min_value is not None or filters.max_value is not None:
+        ranges.append("value")
+    if not ranges:
+        return "Sin user_id se requiere un rango de fechas (date_from/date_to) o de valores (min_value/max_value)"
+
+    sort_column = filter_sort(filters).lstrip("-")
+    if sort_column not in ranges:
+        return f"Sin user_id solo se puede ordenar por la columna filtrada por rango: {', '.join(ranges)}"
+    return None
+
+# Índice FTS5 contentless sobre debts.description (migración 6), mantenido por triggers.
+# La columna oculta con el nombre de la tabla es la que recibe el MATCH
+debts_fts = table("debts_fts", column("rowid", Integer), column("debts_fts"))
+
+# bm25: menor es más relevante; la columna owner (peso 0) solo filtra
+SEARCH_RANK = func.bm25(literal_column("debts_fts"), 1.0, 0.0)
+
+CHANGE_COLUMNS = (
+    DebtChange.id, DebtChange.op, DebtChange.debt_id, DebtChange.user_id,
+    DebtChange.description, DebtChange.value, DebtChange.date, DebtChange.status
+)
+
+# Upsert de deltas sobre debt_summaries; oldest_unpaid_date se recalcula con un seek
+# sobre ix_debts_user_id_status_date. Se ejecuta como executemany (un dict por usuario).
+def _summary_upsert():
+    user_id = bindparam("s_user_id")
+    statement = sqlite_insert(summaries).values(
+        user_id=user_id,
+        total=bindparam("s_total"),
+        unpaid_total=bindparam("s_unpaid_total"),
+        debt_count=bindparam("s_count"),
+        unpaid_count=bindparam("s_unpaid_count"),
+        oldest_unpaid_date=(
+            select(func.min(Debt.date))
+            .where(Debt.user_id == user_id, Debt.status == False)
+            .scalar_subquery()
+        ),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[summaries.c.user_id],
+        set_={
+            "total": summaries.c.total + statement.excluded.total,
+            "unpaid_total": summaries.c.unpaid_total + statement.excluded.unpaid_total,
+            "debt_count": summaries.c.debt_count + statement.excluded.debt_count,
+            "unpaid_count": summaries.c.unpaid_count + statement.excluded.unpaid_count,
+            "oldest_unpaid_date": statement.excluded.oldest_unpaid_date,
+        },
+    )
+
+SUMMARY_UPSERT = _summary_upsert()
+
+@instrument_repository
 class DebtRepository:
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
+        self.versions = VersionRepository(db)
     
-    def get_all(self, skip: int = 0, limit: int = 100) -> list[Debt]:
-        return self.db.query(Debt).offset(skip).limit(limit).all()
+    async def get_all(self, skip: int = 0, limit: int = 100) -> list[Row]:
+        result = await self.db.execute(select(*DEBT_COLUMNS).offset(skip).limit(limit))
+        return result.all()
     
-    def get_by_id(self, debt_id: int) -> Optional[Debt]:
-        return self.db.query(Debt).filter(Debt.id == debt_id).first()
+    async def get_page(
+        self,
+        limit: int = 100,
+        after_id: Optional[int] = None,
+        after_date: Optional[date] = None,
+        order_by: str = "id"
+    ) -> list[Row]:
+        # Keyset pagination: busca por índice desde el último registro visto en vez de OFFSET
+        query = select(*DEBT_COLUMNS)
+
+        if order_by == "date":
+            if after_id is not None:
+                query = query.filter(tuple_(Debt.date, Debt.id) > tuple_(after_date, after_id))
+            query = query.order_by(Debt.date, Debt.id)
+        else:
+            if after_id is not None:
+                query = query.filter(Debt.id > after_id)
+            query = query.order_by(Debt.id)
+
+        result = await self.db.execute(query.limit(limit))
+        return result.all()
     
-    def get_by_user_id(self, user_id: int) -> list[Debt]:
-        return self.db.query(Debt).filter(Debt.user_id == user_id).all()
+    async def filter(
+        self,
+        filters: DebtFilter,
+        limit: int = 100,
+        after_key=None,
+        after_id: Optional[int] = None
+    ) -> list[Row]:
+        """
+        Compila los filtros a una sola consulta con keyset pagination sobre (columna de orden, id).
+        Validar antes con unsupported_filter_reason: el resto de combinaciones no usa índice.
+        """
+        sort = filter_sort(filters)
+        descending = sort.startswith("-")
+        key = SORT_COLUMNS[sort.lstrip("-")]
+
+        # (columna, desde, hasta) de cada rango
+        ranges = [
+            (Debt.date, filters.date_from, filters.date_to),
+            (Debt.value, filters.min_value, filters.max_value),
+        ]
+
+        query = select(*DEBT_COLUMNS)
+        if filters.user_id is not None:
+            query = query.filter(Debt.user_id == filters.user_id)
+        if filters.status is not None:
+            query = query.filter(Debt.status == filters.status)
+
+        for column, lower, upper in ranges:
+            # Con cursor, el extremo del rango por el que empieza el recorrido ya está
+            # implícito en (col, id) > cursor. Si quedara, SQLite podría elegirlo para el
+            # seek y cada página recorrería el índice desde el inicio del rango
+            if column is key and after_id is not None:
+                if not descending and lower is not None and after_key >= lower:
+                    lower = None
+                if descending and upper is not None and after_key <= upper:
+                    upper = None
+            if lower is not None:
+                query = query.filter(column >= lower)
+            if upper is not None:
+                query = query.filter(column <= upper)
+
+        if after_id is not None:
+            if key is Debt.id:
+                query = query.filter(Debt.id < after_id if descending else Debt.id > after_id)
+            elif descending:
+                query = query.filter(tuple_(key, Debt.id) < tuple_(after_key, after_id))
+            else:
+                query = query.filter(tuple_(key, Debt.id) > tuple_(after_key, after_id))
+
+        if key is Debt.id:
+            order = (Debt.id.desc(),) if descending else (Debt.id,)
+        else:
+            order = (key.desc(), Debt.id.desc()) if descending else (key, Debt.id)
+
+        result = await self.db.execute(query.order_by(*order).limit(limit))
+        return result.all()
     
-    def get_unpaid_by_user(self, user_id: int) -> list[Debt]:
-        return self.db.query(Debt).filter(Debt.user_id == user_id, Debt.status == False).all()
+    async def stream_rows(
+        self,
+        user_id: Optional[int] = None,
+        status: Optional[bool] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[list]:
+        # Cursor del lado del servidor + yield_per: memoria constante sin importar el total
+        query = select(*DEBT_COLUMNS)
+
+        if user_id is not None:
+            query = query.filter(Debt.user_id == user_id)
+        if status is not None:
+            query = query.filter(Debt.status == status)
+        if date_from is not None:
+            query = query.filter(Debt.date >= date_from)
+        if date_to is not None:
+            query = query.filter(Debt.date <= date_to)
+
+        # Con user_id o un rango de fechas el orden es (date, id): sale directo de
+        # ix_debts_user_id_date / ix_debts_user_id_status_date / ix_debts_date_id sin ordenar
+        # en un B-tree temporal, que retrasaría el primer byte hasta leer todo el rango.
+        # Sin ellos se recorre la tabla en orden de id
+        if user_id is not None or date_from is not None or date_to is not None:
+            query = query.order_by(Debt.date, Debt.id)
+        else:
+            query = query.order_by(Debt.id)
+
+        result = await self.db.stream(query.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
     
-    def create(self, debt_data: CreateDebt) -> Debt:
-        db_debt = Debt(**debt_data.model_dump())
-        self.db.add(db_debt)
-        self.db.commit()
-        self.db.refresh(db_debt)
-        return db_debt
+    async def search(
+        self,
+        terms: list[str],
+        user_id: Optional[int] = None,
+        status: Optional[bool] = None,
+        limit: int = 20,
+        after_rank: Optional[float] = None,
+        after_id: Optional[int] = None
+    ) -> list[Row]:
+        """
+        Deudas cuya descripción contiene todos los términos, de más a menos relevante.
+        Un término terminado en * busca por prefijo. Keyset pagination sobre (rank, id).
+        """
+        query = (
+            select(*DEBT_COLUMNS, SEARCH_RANK.label("rank"))
+            .select_from(debts_fts.join(Debt, Debt.id == debts_fts.c.rowid))
+            .filter(debts_fts.c.debts_fts.op("MATCH")(self._match_expression(terms, user_id)))
+        )
+
+        if status is not None:
+            query = query.filter(Debt.status == status)
+        if after_id is not None:
+            query = query.filter(tuple_(SEARCH_RANK, Debt.id) > tuple_(after_rank, after_id))
+
+        result = await self.db.execute(query.order_by(SEARCH_RANK, Debt.id).limit(limit))
+        return result.all()
     
-    def update(self, debt_id: int, debt_data: UpdateDebt) -> Optional[Debt]:
-        db_debt = self.get_by_id(debt_id)
+    @staticmethod
+    def _match_expression(terms: list[str], user_id: Optional[int] = None) -> str:
+        # Cada término va entre comillas: el texto del usuario nunca se interpreta como sintaxis FTS5
+        phrases = []
+        for term in terms:
+            prefix = term.endswith("*")
+            phrase = '"' + term.rstrip("*").replace('"', '""') + '"'
+            phrases.append(phrase + "*" if prefix else phrase)
 
-        if not db_debt:
+        expression = "description : (" + " AND ".join(phrases) + ")"
+        if user_id is not None:
+            # El término del dueño primero: su posting list es la más corta
+            expression = f'owner : "u{int(user_id)}" AND ' + expression
+        return expression
+    
+    async def get_by_id(self, debt_id: int) -> Optional[Debt]:
+        result = await self.db.execute(select(Debt).filter(Debt.id == debt_id))
+        return result.scalars().first()
+    
+    async def get_with_user(self, debt_id: int) -> Optional[Row]:
+        # Deuda + datos del usuario en un solo JOIN (sin segunda consulta para debt.user)
+        result = await self.db.execute(
+            select(
+                *DEBT_COLUMNS,
+                User.nombre.label("user_nombre"),
+                User.apellido.label("user_apellido"),
+                User.email.label("user_email")
+            )
+            .join(User, User.id == Debt.user_id)
+            .filter(Debt.id == debt_id)
+        )
+        return result.first()
+    
+    async def get_by_user_id(self, user_id: int) -> Optional[list[Row]]:
+        """Deudas del usuario, o None si el usuario no existe (un solo round-trip)."""
+        return await self._get_by_owner(user_id, Debt.user_id == User.id)
+    
+    async def get_unpaid_by_user(self, user_id: int) -> Optional[list[Row]]:
+        """Deudas impagas del usuario, o None si el usuario no existe (un solo round-trip)."""
+        return await self._get_by_owner(user_id, and_(Debt.user_id == User.id, Debt.status == False))
+    
+    async def _get_by_owner(self, user_id: int, join_condition) -> Optional[list[Row]]:
+        # users LEFT JOIN debts: sin filas => el usuario no existe;
+        # una fila con id NULL => el usuario existe pero no tiene deudas
+        result = await self.db.execute(
+            select(User.id.label("owner_id"), *DEBT_COLUMNS)
+            .select_from(User)
+            .outerjoin(Debt, join_condition)
+            .filter(User.id == user_id)
+        )
+        rows = result.all()
+        if not rows:
             return None
-        
+        return [row for row in rows if row.id is not None]
+    
+    async def create(self, debt_data: CreateDebt) -> Optional[Row]:
+        """Inserta la deuda solo si el usuario existe (INSERT ... SELECT); None si no existe."""
+        data = debt_data.model_dump()
+        source = select(
+            literal(data["description"], Debt.description.type),
+            literal(data["value"], Debt.value.type),
+            literal(data["date"], Debt.date.type),
+            literal(False, Debt.status.type),
+            User.id
+        ).filter(User.id == data["user_id"])
+
+        result = await self.db.execute(
+            insert(Debt)
+            .from_select(["description", "value", "date", "status", "user_id"], source)
+            .returning(*DEBT_COLUMNS)
+        )
+        debt = result.first()
+        if debt is None:
+            await self.db.rollback()
+            return None
+
+        await self._commit_write(
+            self._delta({}, debt.user_id, debt.value, debt.status, 1),
+            changes=[self._change("insert", debt._mapping)]
+        )
+        return debt
+    
+    async def bulk_create(self, debts_data: list[dict], batch_size: int = 1000) -> list[int]:
+        # Una sola transacción; cada lote es un INSERT ... VALUES multi-fila con RETURNING
+        statement = insert(Debt).returning(Debt.id, sort_by_parameter_order=True)
+        ids = []
+        try:
+            for start in range(0, len(debts_data), batch_size):
+                result = await self.db.execute(statement, debts_data[start:start + batch_size])
+                ids.extend(result.scalars().all())
+
+            deltas = {}
+            changes = []
+            for debt_id, debt in zip(ids, debts_data):
+                self._delta(deltas, debt["user_id"], debt["value"], debt.get("status", False), 1)
+                changes.append(self._change("insert", {**debt, "id": debt_id, "status": debt.get("status", False)}))
+            await self._commit_write(deltas, changes=changes)
+        except Exception:
+            await self.db.rollback()
+            raise
+        return ids
+    
+    async def update(self, debt_id: int, debt_data: UpdateDebt) -> Optional[Row]:
         update_data = debt_data.model_dump(exclude_unset=True)
+        if not update_data:
+            result = await self.db.execute(select(*DEBT_COLUMNS).filter(Debt.id == debt_id))
+            return result.first()
 
-        for field, value in update_data.items():
-            setattr(db_debt, field, value)
-        
-        self.db.commit()
-        self.db.refresh(db_debt)
-        return db_debt
+        # RETURNING solo expone los valores nuevos: los anteriores hacen falta únicamente
+        # si cambia algo que afecta los agregados de debt_summaries. Se leen con un SELECT
+        # simple y el UPDATE se condiciona a que la fila siga igual (compare-and-set): si
+        # otro writer la cambió en medio, no afecta filas y se vuelve a leer. La existencia
+        # del nuevo dueño va en el mismo WHERE, sin consulta previa
+        statement = update(Debt).where(Debt.id == debt_id)
+        if "user_id" in update_data:
+            statement = statement.where(select(User.id).where(User.id == update_data["user_id"]).exists())
+        statement = statement.values(**update_data).returning(*DEBT_COLUMNS)
+
+        old = None
+        if update_data.keys() & {"value", "status", "user_id"}:
+            old = await self._read_summary_fields(debt_id)
+            while old is not None:
+                result = await self.db.execute(statement.where(
+                    Debt.user_id == old.user_id, Debt.value == old.value, Debt.status == old.status
+                ))
+                debt = result.first()
+                if debt is not None:
+                    break
+                await self.db.rollback()
+                current = await self._read_summary_fields(debt_id)
+                if current == old:
+                    # La fila no cambió: lo que falló es la existencia del usuario
+                    return None
+                old = current
+            if old is None:
+                return None
+        else:
+            result = await self.db.execute(statement)
+            debt = result.first()
+            if debt is None:
+                await self.db.rollback()
+                return None
+
+        deltas = {}
+        if old is not None:
+            self._delta(deltas, old.user_id, old.value, old.status, -1)
+            self._delta(deltas, debt.user_id, debt.value, debt.status, 1)
+        elif "date" in update_data:
+            # Delta nulo: solo recalcula oldest_unpaid_date del dueño
+            deltas[debt.user_id] = [0.0, 0.0, 0, 0]
+
+        changes = [self._change("update", debt._mapping)]
+        if old is not None and old.user_id != debt.user_id:
+            # Cambio de dueño: quien sincroniza solo al dueño anterior debe ver la baja
+            changes.insert(0, self._tombstone(debt_id, old.user_id))
+        await self._commit_write(deltas, owners=(debt.user_id,), changes=changes)
+        return debt
     
-    def delete(self, debt_id: int) -> bool:
-        db_debt = self.get_by_id(debt_id)
+    async def _read_summary_fields(self, debt_id: int) -> Optional[Row]:
+        result = await self.db.execute(
+            select(Debt.user_id, Debt.value, Debt.status).filter(Debt.id == debt_id)
+        )
+        return result.first()
 
-        if not db_debt:
+    async def delete(self, debt_id: int) -> bool:
+        result = await self.db.execute(
+            delete(Debt).where(Debt.id == debt_id).returning(Debt.user_id, Debt.value, Debt.status)
+        )
+        debt = result.first()
+
+        if debt is None:
+            await self.db.rollback()
             return False
         
-        self.db.delete(db_debt)
-        self.db.commit()
+        await self._commit_write(
+            self._delta({}, debt.user_id, debt.value, debt.status, -1),
+            changes=[self._tombstone(debt_id, debt.user_id)]
+        )
         return True
     
-    def mark_as_paid(self, debt_id: int) -> Optional[Debt]:
-        db_debt = self.get_by_id(debt_id)
+    async def mark_as_paid(self, debt_id: int) -> Optional[Row]:
+        result = await self.db.execute(
+            update(Debt)
+            .where(Debt.id == debt_id, Debt.status == False)
+            .values(status=True)
+            .returning(*DEBT_COLUMNS)
+        )
+        debt = result.first()
 
-        if not db_debt:
-            return None
+        if debt is None:
+            # Sin filas: la deuda no existe o ya estaba pagada (se devuelve tal cual)
+            await self.db.rollback()
+            result = await self.db.execute(select(*DEBT_COLUMNS).filter(Debt.id == debt_id))
+            return result.first()
         
-        db_debt.status = True
-        self.db.commit()
-        self.db.refresh(db_debt)
+        deltas = self._delta({}, debt.user_id, debt.value, False, -1)
+        await self._commit_write(
+            self._delta(deltas, debt.user_id, debt.value, True, 1),
+            changes=[self._change("update", debt._mapping)]
+        )
         
-        return db_debt
\ No newline at end of file
+        return debt
+    
+    async def mark_many_as_paid(self, debt_ids: list[int], returning: bool = False) -> tuple[int, list]:
+        return await self._mark_paid_where(Debt.id.in_(debt_ids), returning=returning)
+    
+    async def mark_user_debts_as_paid(self, user_id: int, returning: bool = False) -> tuple[int, list]:
+        return await self._mark_paid_where(Debt.user_id == user_id, returning=returning)
+    
+    async def mark_debts_before_as_paid(self, before: date, returning: bool = False) -> tuple[int, list]:
+        return await self._mark_paid_where(Debt.date < before, returning=returning)
+    
+    async def _mark_paid_where(self, condition, returning: bool = False) -> tuple[int, list]:
+        # Todo por conjuntos, sin traer cada fila a Python (salvo que se pida RETURNING).
+        # El INSERT ... SELECT del registro de cambios va primero: abre la transacción de
+        # escritura y toma el lock, así el agregado y el UPDATE ven las mismas filas
+        unpaid = and_(condition, Debt.status == False)
+        await self.db.execute(
+            insert(debt_changes).from_select(
+                ["op", "debt_id", "user_id", "description", "value", "date", "status"],
+                select(literal("update"), Debt.id, Debt.user_id, Debt.description, Debt.value, Debt.date, literal(True))
+                .where(unpaid)
+            )
+        )
+
+        # Pagar solo mueve montos de "impago" a "pagado": total y debt_count no cambian
+        result = await self.db.execute(
+            select(Debt.user_id, func.sum(Debt.value), func.count()).where(unpaid).group_by(Debt.user_id)
+        )
+        deltas = {user_id: [0.0, -total, 0, -count] for user_id, total, count in result.all()}
+        if not deltas:
+            await self.db.rollback()
+            return 0, []
+
+        statement = update(Debt).where(unpaid).values(status=True).execution_options(synchronize_session=False)
+        if returning:
+            result = await self.db.execute(statement.returning(*DEBT_COLUMNS))
+            rows = result.mappings().all()
+            updated = len(rows)
+        else:
+            result = await self.db.execute(statement)
+            rows, updated = [], result.rowcount
+
+        await self._commit_write(deltas, changes_logged=True)
+        return updated, rows
+    
+    async def get_changes(self, after_id: int = 0, user_id: Optional[int] = None, limit: int = 100) -> list[Row]:
+        # Seek por la PK (o por ix_debt_changes_user_id_id si se filtra por usuario)
+        query = select(*CHANGE_COLUMNS).filter(DebtChange.id > after_id)
+        if user_id is not None:
+            query = query.filter(DebtChange.user_id == user_id)
+        result = await self.db.execute(query.order_by(DebtChange.id).limit(limit))
+        return result.all()
+    
+    async def get_last_change_id(self) -> int:
+        result = await self.db.execute(select(func.max(DebtChange.id)))
+        return result.scalar() or 0
+    
+    async def get_summary(self, user_id: int):
+        # LEFT JOIN desde users: None solo si el usuario no existe; sin deudas devuelve ceros
+        result = await self.db.execute(
+            select(
+                User.id.label("user_id"),
+                func.coalesce(summaries.c.total, 0).label("total"),
+                func.coalesce(summaries.c.unpaid_total, 0).label("unpaid_total"),
+                func.coalesce(summaries.c.debt_count, 0).label("debt_count"),
+                func.coalesce(summaries.c.unpaid_count, 0).label("unpaid_count"),
+                summaries.c.oldest_unpaid_date,
+            )
+            .select_from(User)
+            .outerjoin(summaries, summaries.c.user_id == User.id)
+            .filter(User.id == user_id)
+        )
+        return result.mappings().first()
+    
+    async def get_leaderboard(self, limit: int = 10) -> list:
+        result = await self.db.execute(
+            select(summaries)
+            .filter(summaries.c.unpaid_total > 0)
+            .order_by(summaries.c.unpaid_total.desc())
+            .limit(limit)
+        )
+        return result.mappings().all()
+    
+    async def compute_summary(self, user_id: int):
+        # Cálculo en vivo con GROUP BY (sin pasar por debt_summaries); mismo LEFT JOIN que get_summary
+        result = await self.db.execute(
+            select(*self._summary_columns(User.id))
+            .select_from(User)
+            .outerjoin(Debt, Debt.user_id == User.id)
+            .filter(User.id == user_id)
+            .group_by(User.id)
+        )
+        return result.mappings().first()
+    
+    async def compute_leaderboard(self, limit: int = 10) -> list:
+        columns = self._summary_columns()
+        unpaid_total = columns[2]
+        result = await self.db.execute(
+            select(*columns)
+            .group_by(Debt.user_id)
+            .having(unpaid_total > 0)
+            .order_by(unpaid_total.desc())
+            .limit(limit)
+        )
+        return result.mappings().all()
+    
+    @staticmethod
+    def _summary_columns(owner=Debt.user_id) -> tuple:
+        unpaid = Debt.status == False
+        return (
+            owner.label("user_id"),
+            func.coalesce(func.sum(Debt.value), 0).label("total"),
+            func.coalesce(func.sum(case((unpaid, Debt.value))), 0).label("unpaid_total"),
+            func.count(Debt.id).label("debt_count"),
+            func.coalesce(func.sum(case((unpaid, 1), else_=0)), 0).label("unpaid_count"),
+            func.min(case((unpaid, Debt.date))).label("oldest_unpaid_date"),
+        )
+    
+    @staticmethod
+    def _delta(deltas: dict, user_id: int, value: float, paid: Optional[bool], sign: int) -> dict:
+        # Acumula por usuario: [total, unpaid_total, debt_count, unpaid_count]
+        delta = deltas.setdefault(user_id, [0.0, 0.0, 0, 0])
+        delta[0] += sign * value
+        delta[2] += sign
+        if not paid:
+            delta[1] += sign * value
+            delta[3] += sign
+        return deltas
+    
+    @staticmethod
+    def _change(op: str, debt) -> dict:
+        # debt: mapping con las columnas de DEBT_COLUMNS (estado de la deuda después de la escritura)
+        return {
+            "op": op,
+            "debt_id": debt["id"],
+            "user_id": debt["user_id"],
+            "description": debt["description"],
+            "value": debt["value"],
+            "date": debt["date"],
+            "status": debt["status"],
+        }
+    
+    @staticmethod
+    def _tombstone(debt_id: int, user_id: int) -> dict:
+        # executemany exige las mismas claves en todos los dicts
+        return {
+            "op": "delete",
+            "debt_id": debt_id,
+            "user_id": user_id,
+            "description": None,
+            "value": None,
+            "date": None,
+            "status": None,
+        }
+    
+    async def _commit_write(self, deltas: dict, owners: tuple = (), changes: list = (), changes_logged: bool = False) -> None:
+        # debt_summaries, las versiones de los dueños (ETags) y el registro de cambios
+        # viajan en la misma transacción. changes_logged: el llamador ya insertó sus cambios
+        # (INSERT ... SELECT) y solo hace falta avisar a los streams
+        await self._apply_summary_deltas(deltas)
+        await self.versions.bump(debt_owner_ids=deltas.keys() | set(owners))
+        if changes:
+            await self.db.execute(insert(debt_changes), list(changes))
+        await self.db.commit()
+        if changes or changes_logged:
+            debt_change_notifier.notify()
+    
+    async def _apply_summary_deltas(self, deltas: dict) -> None:
+        if not deltas:
+            return
+        await self.db.execute(SUMMARY_UPSERT, [
+            {
+                "s_user_id": user_id,
+                "s_total": total,
+                "s_unpaid_total": unpaid_total,
+                "s_count": count,
+                "s_unpaid_count": unpaid_count,
+            }
+            for user_id, (total, unpaid_total, count, unpaid_count) in deltas.items()
+        ])
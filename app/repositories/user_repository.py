@@ -1,74 +1,143 @@
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, delete, insert, literal, not_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.auth_cache import principal_cache
+from app.core.change_notifier import debt_change_notifier
+from app.core.metrics import instrument_repository
+from app.models.debt_change_model import DebtChange
+from app.models.debt_model import Debt
+from app.models.debt_summary_model import DebtSummary
 from app.models.user_model import User
+from app.repositories.version_repository import VersionRepository
 from app.schemas.user_schema import CreateUser, UpdateUser, UserStatusResponse
 
+# Columnas públicas: los listados nunca cargan el hash del password
+USER_PUBLIC_COLUMNS = (User.id, User.email, User.nombre, User.apellido, User.is_active)
+
+@instrument_repository
 class UserRepository:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
+        self.versions = VersionRepository(db)
 
-    def get_all(self, skip: int = 0, limit: int = 100) -> list[User]:
-        return self.db.query(User).offset(skip).limit(limit).all()
+    async def get_all(self, skip: int = 0, limit: int = 100) -> list[Row]:
+        # Proyección de columnas: filas livianas, fuera del identity map de la sesión
+        result = await self.db.execute(select(*USER_PUBLIC_COLUMNS).offset(skip).limit(limit))
+        return result.all()
+    
+    async def get_page(self, limit: int = 100, after_id: Optional[int] = None) -> list[Row]:
+        # Keyset pagination sobre la PK: WHERE id > :after_id en vez de OFFSET
+        query = select(*USER_PUBLIC_COLUMNS)
+        if after_id is not None:
+            query = query.filter(User.id > after_id)
+        result = await self.db.execute(query.order_by(User.id).limit(limit))
+        return result.all()
+    
+    async def get_by_id(self, user_id: int) -> Optional[User]:
+        result = await self.db.execute(select(User).filter(User.id == user_id))
+        return result.scalars().first()
     
-    def get_by_id(self, user_id: int) -> Optional[User]:
-        return self.db.query(User).filter(User.id == user_id).first()
+    async def get_by_email(self, email: str) -> Optional[User]:
+        result = await self.db.execute(select(User).filter(User.email == email))
+        return result.scalars().first()
     
-    def get_by_email(self, email: str) -> Optional[User]:
-        return self.db.query(User).filter(User.email == email).first()
+    async def get_existing_ids(self, user_ids: set[int]) -> set[int]:
+        # Una sola consulta IN para validar muchos IDs a la vez
+        if not user_ids:
+            return set()
+        result = await self.db.execute(select(User.id).filter(User.id.in_(user_ids)))
+        return set(result.scalars().all())
     
-    def get_active_users(self) -> list[User]:
-        return self.db.query(User).filter(User.is_active == True).all()
+    async def get_active_users(self) -> list[Row]:
+        # Solo las columnas que necesita el servicio para armar fullName
+        result = await self.db.execute(select(User.nombre, User.apellido).filter(User.is_active == True))
+        return result.all()
     
-    def changeStatus(self, user_id: int) -> Optional[User]:
-        db_user = self.get_by_id(user_id)
+    async def changeStatus(self, user_id: int) -> Optional[Row]:
+        # Un solo UPDATE ... RETURNING: sin SELECT previo ni refresh posterior
+        result = await self.db.execute(
+            update(User)
+            .where(User.id == user_id)
+            .values(is_active=not_(User.is_active))
+            .returning(*USER_PUBLIC_COLUMNS)
+        )
+        db_user = result.first()
 
-        if not db_user:
+        if db_user is None:
+            await self.db.rollback()
             return None
-        
-        db_user.is_active = not db_user.is_active
 
-        self.db.commit()
-        self.db.refresh(db_user)
+        await self.versions.bump(user_ids=(user_id,))
+        await self.db.commit()
+        principal_cache.invalidate_user(user_id)
 
         return db_user
     
-    def create(self, user_data: dict) -> User:
+    async def create(self, user_data: dict) -> User:
 
         # Crear User desde dict usando **
         user = User(**user_data)
         
         self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        await self.db.flush()
+        # Si el ID fue reutilizado, la versión sigue desde la del usuario borrado
+        await self.versions.bump(user_ids=(user.id,), debt_owner_ids=(user.id,))
+        await self.db.commit()
+        await self.db.refresh(user)
         
         return user
     
-    def update(self, user_id: int, user_data: UpdateUser) -> Optional[User]:
-
-        db_user = self.get_by_id(user_id)
+    async def update(self, user_id: int, user_data: UpdateUser) -> Optional[Row]:
 
-        if not db_user:
-            return None
-        
         # Convertir Pydantic model a dict, excluyendo campos None
         update_data = user_data.model_dump(exclude_unset=True)
+
+        if not update_data:
+            result = await self.db.execute(select(*USER_PUBLIC_COLUMNS).filter(User.id == user_id))
+            return result.first()
         
-        # Actualizar solo los campos presentes
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
+        # Actualizar solo los campos presentes; "no encontrado" es un RETURNING vacío
+        result = await self.db.execute(
+            update(User).where(User.id == user_id).values(**update_data).returning(*USER_PUBLIC_COLUMNS)
+        )
+        db_user = result.first()
+
+        if db_user is None:
+            await self.db.rollback()
+            return None
         
-        self.db.commit()
-        self.db.refresh(db_user)
+        await self.versions.bump(user_ids=(user_id,))
+        await self.db.commit()
+        principal_cache.invalidate_user(user_id)
         return db_user
     
-    def delete(self, user_id: int) -> bool:
+    async def update_password(self, user_id: int, hashed_password: str) -> None:
+        await self.db.execute(
+            update(User).where(User.id == user_id).values(password=hashed_password)
+        )
+        await self.db.commit()
+    
+    async def delete(self, user_id: int) -> bool:
         
-        db_user = self.get_by_id(user_id)
+        # Cascade en SQL (hijos primero, respetando las FK): sin cargar la colección debts.
+        # Antes de borrar, un tombstone por deuda en debt_changes (INSERT ... SELECT)
+        await self.db.execute(
+            insert(DebtChange.__table__).from_select(
+                ["op", "debt_id", "user_id"],
+                select(literal("delete"), Debt.id, Debt.user_id).filter(Debt.user_id == user_id)
+            )
+        )
+        await self.db.execute(delete(Debt).where(Debt.user_id == user_id))
+        await self.db.execute(delete(DebtSummary.__table__).where(DebtSummary.user_id == user_id))
+        result = await self.db.execute(delete(User).where(User.id == user_id).returning(User.id))
 
-        if not db_user:
+        if result.first() is None:
+            await self.db.rollback()
             return False
         
-        self.db.delete(db_user)
-        self.db.commit()
-        return True
\ No newline at end of file
+        await self.versions.bump(user_ids=(user_id,), debt_owner_ids=(user_id,))
+        await self.db.commit()
+        principal_cache.invalidate_user(user_id)
+        debt_change_notifier.notify()
+        return True
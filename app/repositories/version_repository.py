@@ -0,0 +1,57 @@
+from typing import Iterable, Optional
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.metrics import instrument_repository
+from app.models.user_version_model import UserVersion
+
+versions = UserVersion.__table__
+
+# Incrementa los contadores de varios usuarios en un solo executemany (un dict por usuario)
+def _version_upsert():
+    statement = sqlite_insert(versions).values(
+        user_id=bindparam("v_user_id"),
+        user_version=bindparam("v_user"),
+        debts_version=bindparam("v_debts"),
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[versions.c.user_id],
+        set_={
+            "user_version": versions.c.user_version + statement.excluded.user_version,
+            "debts_version": versions.c.debts_version + statement.excluded.debts_version,
+        },
+    )
+
+VERSION_UPSERT = _version_upsert()
+
+@instrument_repository
+class VersionRepository:
+    """
+    Versiones por usuario que respaldan los ETags de GET /users/{id} y GET /debts/user/{id}.
+    Los bump no hacen commit: se ejecutan dentro de la transacción de la escritura.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_user_version(self, user_id: int) -> Optional[int]:
+        result = await self.db.execute(select(UserVersion.user_version).filter(UserVersion.user_id == user_id))
+        return result.scalar_one_or_none()
+
+    async def get_debts_version(self, user_id: int) -> Optional[int]:
+        result = await self.db.execute(select(UserVersion.debts_version).filter(UserVersion.user_id == user_id))
+        return result.scalar_one_or_none()
+
+    async def bump(self, user_ids: Iterable[int] = (), debt_owner_ids: Iterable[int] = ()) -> None:
+        bumps: dict[int, list[int]] = {}
+        for user_id in user_ids:
+            bumps.setdefault(user_id, [0, 0])[0] = 1
+        for user_id in debt_owner_ids:
+            bumps.setdefault(user_id, [0, 0])[1] = 1
+        if not bumps:
+            return
+
+        await self.db.execute(VERSION_UPSERT, [
+            {"v_user_id": user_id, "v_user": user_bump, "v_debts": debts_bump}
+            for user_id, (user_bump, debts_bump) in bumps.items()
+        ])
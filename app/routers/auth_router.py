@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.schemas.auth import LoginRequest, TokenResponse
 from app.services.auth_service import AuthService
@@ -10,6 +10,6 @@ router = APIRouter(
 )
 
 @router.post("/login", response_model=TokenResponse, status_code=status.HTTP_200_OK)
-def login( credentials: LoginRequest, db: Session = Depends(get_db)):
+async def login( credentials: LoginRequest, db: AsyncSession = Depends(get_db)):
     auth_service = AuthService(db)
-    return auth_service.login(credentials)
\ No newline at end of file
+    return await auth_service.login(credentials)
\ No newline at end of file
@@ -1,76 +1,251 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from app.database import get_db
+from datetime import date
+from typing import Literal, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.etag import etag_headers, not_modified
+from app.core.responses import FastJSONResponse
+from app.database import get_db, get_read_db
+from app.services.debt_change_service import SSE_HEADERS, DebtChangeService
+from app.services.debt_export_service import MEDIA_TYPES, DebtExportService
+from app.services.debt_import_service import DebtImportService, errors_path, get_import_report
 from app.services.debt_service import DebtService
-from app.schemas.debt_schema import CreateDebt, UpdateDebt, DebtResponse, DebtWithUserResponse
+from app.schemas.debt_schema import (
+    BulkCreateDebtResponse, BulkPayRequest, BulkPayResponse, CreateDebt, UpdateDebt, DebtChangesPage, DebtFilter, DebtImportReport, DebtPage, DebtResponse, DebtSearchPage, DebtSort, DebtSummaryResponse,
+    DebtWithUserResponse
+)
 
 router = APIRouter(
     prefix="/debts",
     tags=["debts"]
 )
 
-@router.get("/", response_model=list[DebtResponse], status_code=status.HTTP_200_OK)
-def get_all_debts(
+@router.get("/", response_model=Union[DebtPage, list[DebtResponse]], status_code=status.HTTP_200_OK)
+async def get_all_debts(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    pagination: Literal["offset", "cursor"] = "offset",
+    order_by: Literal["id", "date"] = "id",
+    db: AsyncSession = Depends(get_read_db)
+):
+    service = DebtService(db)
+    return FastJSONResponse(await service.get_all_debts(
+        skip=skip, limit=limit, cursor=cursor, pagination=pagination, order_by=order_by
+    ))
+
+@router.get("/summary/leaderboard", response_model=list[DebtSummaryResponse], status_code=status.HTTP_200_OK)
+async def get_debt_leaderboard(
+    limit: int = 10,
+    live: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    service = DebtService(db)
+    return await service.get_leaderboard(limit=limit, live=live)
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_debts(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    user_id: Optional[int] = None,
+    paid: Optional[bool] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None
+):
+    service = DebtExportService()
+    return StreamingResponse(
+        service.export_debts(format=format, user_id=user_id, status=paid, date_from=date_from, date_to=date_to),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=debts.{format}"}
+    )
+
+@router.get("/filter", response_model=DebtPage, status_code=status.HTTP_200_OK)
+async def filter_debts(
+    user_id: Optional[int] = None,
+    paid: Optional[bool] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    min_value: Optional[float] = None,
+    max_value: Optional[float] = None,
+    sort: Optional[DebtSort] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
     service = DebtService(db)
-    return service.get_all_debts(skip=skip, limit=limit)
+    filters = DebtFilter(
+        user_id=user_id, status=paid, date_from=date_from, date_to=date_to,
+        min_value=min_value, max_value=max_value, sort=sort
+    )
+    return FastJSONResponse(await service.filter_debts(filters, limit=limit, cursor=cursor))
+
+@router.get("/search", response_model=DebtSearchPage, status_code=status.HTTP_200_OK)
+async def search_debts(
+    q: str,
+    user_id: Optional[int] = None,
+    paid: Optional[bool] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    service = DebtService(db)
+    return FastJSONResponse(await service.search_debts(q, user_id=user_id, paid=paid, limit=limit, cursor=cursor))
+
+@router.get("/changes", response_model=DebtChangesPage, status_code=status.HTTP_200_OK)
+async def get_debt_changes(
+    since: Optional[str] = None,
+    user_id: Optional[int] = None,
+    limit: int = 500,
+    db: AsyncSession = Depends(get_read_db)
+):
+    service = DebtChangeService(db)
+    return FastJSONResponse(await service.get_changes(since=since, user_id=user_id, limit=limit))
+
+@router.get("/changes/stream", status_code=status.HTTP_200_OK)
+async def stream_debt_changes(
+    since: Optional[str] = None,
+    user_id: Optional[int] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    # Al reconectar, EventSource envía el id del último evento recibido
+    service = DebtChangeService()
+    return StreamingResponse(
+        service.stream_changes(since=last_event_id or since, user_id=user_id),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
 
 @router.get("/{debt_id}", response_model=DebtWithUserResponse, status_code=status.HTTP_200_OK)
-def get_debt_by_id(
+async def get_debt_by_id(
     debt_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     service = DebtService(db)
-    return service.get_debt_by_id(debt_id)
+    return await service.get_debt_by_id(debt_id)
 
 @router.get("/user/{user_id}", response_model=list[DebtResponse], status_code=status.HTTP_200_OK)
-def get_debts_by_user(
+async def get_debts_by_user(
+    user_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
+):
+    service = DebtService(db)
+    etag, debts = await service.get_debts_by_user_conditional(user_id, if_none_match)
+    if debts is None:
+        return not_modified(etag)
+    return FastJSONResponse(debts, headers=etag_headers(etag))
+
+@router.get("/user/{user_id}/summary", response_model=DebtSummaryResponse, status_code=status.HTTP_200_OK)
+async def get_user_debt_summary(
     user_id: int,
-    db: Session = Depends(get_db)
+    live: bool = False,
+    db: AsyncSession = Depends(get_read_db)
 ):
     service = DebtService(db)
-    return service.get_debts_by_user(user_id)
+    return await service.get_user_summary(user_id, live=live)
 
 @router.get("/user/{user_id}/unpaid", response_model=list[DebtResponse], status_code=status.HTTP_200_OK)
-def get_unpaid_debts_by_user(
+async def get_unpaid_debts_by_user(
     user_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     service = DebtService(db)
-    return service.get_unpaid_debts_by_user(user_id)
+    return FastJSONResponse(await service.get_unpaid_debts_by_user(user_id))
 
 @router.post("/", response_model=DebtResponse, status_code=status.HTTP_201_CREATED)
-def create_debt(
+async def create_debt(
     debt: CreateDebt,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
+):
+    service = DebtService(db)
+    return await service.create_debt(debt)
+
+@router.post("/bulk", response_model=BulkCreateDebtResponse, status_code=status.HTTP_201_CREATED)
+async def create_debts_bulk(
+    debts: list[CreateDebt],
+    mode: Literal["all_or_nothing", "per_item"] = "all_or_nothing",
+    db: AsyncSession = Depends(get_db)
 ):
     service = DebtService(db)
-    return service.create_debt(debt)
+    return await service.create_debts_bulk(debts, mode=mode)
+
+@router.post("/import", response_model=DebtImportReport, status_code=status.HTTP_200_OK)
+async def import_debts(
+    request: Request,
+    import_id: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    # El body (CSV) se consume en streaming: no se bufferiza el archivo completo
+    service = DebtImportService(db)
+    return await service.import_csv(request.stream(), import_id=import_id)
+
+@router.get("/import/{import_id}", response_model=DebtImportReport, status_code=status.HTTP_200_OK)
+async def get_import_progress(import_id: str):
+    report = get_import_report(import_id)
+    if report is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Importación {import_id} no encontrada"
+        )
+    return report
+
+@router.get("/import/{import_id}/errors", status_code=status.HTTP_200_OK)
+async def get_import_errors(import_id: str):
+    report = get_import_report(import_id)
+    if report is None or report.errors_url is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"La importación {import_id} no tiene archivo de errores"
+        )
+    return FileResponse(errors_path(import_id), media_type="text/csv", filename=f"{import_id}.errors.csv")
 
 @router.put("/{debt_id}", response_model=DebtResponse, status_code=status.HTTP_200_OK)
-def update_debt(
+async def update_debt(
     debt_id: int,
     debt: UpdateDebt,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     service = DebtService(db)
-    return service.update_debt(debt_id, debt)
+    return await service.update_debt(debt_id, debt)
 
 @router.delete("/{debt_id}", status_code=status.HTTP_200_OK)
-def delete_debt(
+async def delete_debt(
     debt_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     service = DebtService(db)
-    return service.delete_debt(debt_id)
+    return await service.delete_debt(debt_id)
 
 @router.patch("/{debt_id}/pay", response_model=DebtResponse, status_code=status.HTTP_200_OK)
-def mark_debt_as_paid(
+async def mark_debt_as_paid(
     debt_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
+):
+    service = DebtService(db)
+    return await service.mark_debt_as_paid(debt_id)
+
+@router.patch("/pay", response_model=BulkPayResponse, response_model_exclude_none=True, status_code=status.HTTP_200_OK)
+async def mark_debts_as_paid(
+    payload: BulkPayRequest,
+    returning: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    service = DebtService(db)
+    return await service.mark_debts_as_paid(payload.ids, returning=returning)
+
+@router.patch("/pay/before/{before}", response_model=BulkPayResponse, response_model_exclude_none=True, status_code=status.HTTP_200_OK)
+async def mark_debts_before_as_paid(
+    before: date,
+    returning: bool = False,
+    db: AsyncSession = Depends(get_db)
+):
+    service = DebtService(db)
+    return await service.mark_debts_before_as_paid(before, returning=returning)
+
+@router.patch("/user/{user_id}/pay", response_model=BulkPayResponse, response_model_exclude_none=True, status_code=status.HTTP_200_OK)
+async def mark_user_debts_as_paid(
+    user_id: int,
+    returning: bool = False,
+    db: AsyncSession = Depends(get_db)
 ):
     service = DebtService(db)
-    return service.mark_debt_as_paid(debt_id)
\ No newline at end of file
+    return await service.mark_user_debts_as_paid(user_id, returning=returning)
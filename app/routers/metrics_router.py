@@ -0,0 +1,12 @@
+from fastapi import APIRouter, status
+from fastapi.responses import Response
+from app.core.metrics import CONTENT_TYPE, render_metrics
+
+router = APIRouter(
+    tags=["metrics"]
+)
+
+@router.get("/metrics", status_code=status.HTTP_200_OK, include_in_schema=False)
+async def get_metrics():
+    # Formato de texto de Prometheus; los gauges de pool/threadpool se calculan aquí
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
@@ -1,57 +1,68 @@
 # app/routers/user_router.py
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Union
 from app.core.dependencies import get_current_user
-from app.database import get_db
-from app.models.user_model import User
+from app.core.etag import etag_headers, not_modified
+from app.core.responses import FastJSONResponse
+from app.database import get_db, get_read_db
+from app.core.auth_cache import AuthenticatedUser
 from app.services.user_service import UserService
-from app.schemas.user_schema import CreateUser, PostResponse, UpdateUser, UserNameResponse, UserResponse, UserStatusResponse
+from app.schemas.user_schema import CreateUser, PostResponse, UpdateUser, UserNameResponse, UserPage, UserResponse, UserStatusResponse
 
 # Crear el router
 router = APIRouter(prefix = "/users", tags = ["users"])
 
-@router.get("/", response_model = List[UserResponse], status_code = status.HTTP_200_OK)
-def get_all_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+@router.get("/", response_model = Union[UserPage, List[UserResponse]], status_code = status.HTTP_200_OK)
+async def get_all_users(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, pagination: Literal["offset", "cursor"] = "offset", db: AsyncSession = Depends(get_read_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     service = UserService(db)
-    return service.get_all_users(skip = skip, limit = limit)
+    return FastJSONResponse(await service.get_all_users(skip = skip, limit = limit, cursor = cursor, pagination = pagination))
 
 @router.get("/activeUsers", response_model = List[UserNameResponse], status_code = status.HTTP_200_OK)
-def get_active_users(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_active_users(db: AsyncSession = Depends(get_read_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     service = UserService(db)
-    return service.get_active_users()
+    return await service.get_active_users()
 
 @router.get("/{user_id}", response_model = UserResponse, status_code = status.HTTP_200_OK)
-def get_user_by_id(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_user_by_id(user_id: int, response: Response, if_none_match: Optional[str] = Header(None), db: AsyncSession = Depends(get_read_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     service = UserService(db)
-    return service.get_user_by_id(user_id)
+    etag, user = await service.get_user_by_id_conditional(user_id, if_none_match)
+    if user is None:
+        return not_modified(etag)
+    response.headers.update(etag_headers(etag))
+    return user
 
 @router.post("/", response_model = UserResponse, status_code = status.HTTP_201_CREATED)
-def create_user(user: CreateUser, db: Session = Depends(get_db)):
+async def create_user(user: CreateUser, db: AsyncSession = Depends(get_db)):
     service = UserService(db)
-    return service.create_user(user)
+    return await service.create_user(user)
 
 @router.put("/{user_id}", response_model = UserResponse, status_code = status.HTTP_200_OK)
-def update_user(user_id: int, user: UpdateUser, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_user(user_id: int, user: UpdateUser, db: AsyncSession = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     service = UserService(db)
-    return service.update_user(user_id, user)
+    return await service.update_user(user_id, user)
 
 @router.delete("/{user_id}", status_code=status.HTTP_200_OK)
-def delete_user(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     service = UserService(db)
-    return service.delete_user(user_id)
+    return await service.delete_user(user_id)
 
 @router.post("/changeStatus/{user_id}", response_model = UserStatusResponse, status_code = status.HTTP_200_OK)
-def change_user_status(user_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def change_user_status(user_id: int, db: AsyncSession = Depends(get_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     service = UserService(db)
-    return service.change_user_status(user_id)
+    return await service.change_user_status(user_id)
 
 @router.get("/external/posts", response_model = List[PostResponse], status_code = status.HTTP_200_OK)
-async def get_all_posts(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_all_posts(db: AsyncSession = Depends(get_read_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     service = UserService(db)
     return await service.get_all_posts()
 
+@router.get("/external/cache/stats", status_code = status.HTTP_200_OK)
+async def get_external_cache_stats(db: AsyncSession = Depends(get_read_db), current_user: AuthenticatedUser = Depends(get_current_user)):
+    service = UserService(db)
+    return service.get_external_cache_stats()
+
 @router.get("/external/posts/{post_id}", response_model = PostResponse, status_code = status.HTTP_200_OK)
-async def get_post_by_id(post_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def get_post_by_id(post_id: int, db: AsyncSession = Depends(get_read_db), current_user: AuthenticatedUser = Depends(get_current_user)):
     service = UserService(db)
     return await service.get_post_by_id(post_id)
\ No newline at end of file
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel, ConfigDict
 from datetime import date
 
@@ -31,3 +31,78 @@ class DebtWithUserResponse(DebtResponse):
     user_nombre: str
     user_apellido: str
     user_email: str
+
+class DebtPage(BaseModel):
+    items: list[DebtResponse]
+    next_cursor: Optional[str] = None
+
+DebtSort = Literal["date", "-date", "value", "-value", "id", "-id"]
+
+class DebtFilter(BaseModel):
+    # Filtros combinables de GET /debts/filter (ver DebtRepository.filter)
+    user_id: Optional[int] = None
+    status: Optional[bool] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    # "-" = descendente. Sin valor: la columna del rango filtrado (date si no hay ninguno)
+    sort: Optional[DebtSort] = None
+
+class DebtSearchResult(DebtResponse):
+    # bm25 de FTS5: menor es más relevante
+    rank: float
+
+class DebtSearchPage(BaseModel):
+    items: list[DebtSearchResult]
+    next_cursor: Optional[str] = None
+
+class DebtChangeResponse(BaseModel):
+    op: Literal["insert", "update", "delete"]
+    debt_id: int
+    user_id: int
+    # None en los tombstones (op="delete")
+    debt: Optional[DebtResponse] = None
+
+class DebtChangesPage(BaseModel):
+    changes: list[DebtChangeResponse]
+    # Siempre presente: el cliente lo guarda y lo envía en la siguiente consulta
+    next_cursor: str
+    has_more: bool
+
+class BulkDebtError(BaseModel):
+    index: int
+    user_id: int
+    detail: str
+
+class BulkCreateDebtResponse(BaseModel):
+    created: int
+    ids: list[int]
+    errors: list[BulkDebtError] = []
+
+class BulkPayRequest(BaseModel):
+    ids: list[int]
+
+class BulkPayResponse(BaseModel):
+    updated: int
+    debts: Optional[list[DebtResponse]] = None
+
+class DebtSummaryResponse(BaseModel):
+    user_id: int
+    total: float
+    unpaid_total: float
+    debt_count: int
+    unpaid_count: int
+    oldest_unpaid_date: Optional[date] = None
+
+class DebtImportReport(BaseModel):
+    import_id: str
+    status: str
+    rows_total: int = 0
+    rows_imported: int = 0
+    rows_failed: int = 0
+    bytes_read: int = 0
+    elapsed_seconds: float = 0.0
+    rows_per_second: float = 0.0
+    errors_url: Optional[str] = None
+    error: Optional[str] = None
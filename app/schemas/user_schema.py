@@ -65,6 +65,10 @@ class UserResponse(UserBase):
     nombre: str
     apellido: str
 
+class UserPage(BaseModel):
+    items: list[UserResponse]
+    next_cursor: Optional[str] = None
+
 class UserNameResponse(BaseModel):
     fullName: str
 
@@ -1,21 +1,22 @@
 # app/services/auth_service.py
 from datetime import timedelta
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.security import verify_password, create_access_token
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.hashing import password_hasher
+from app.core.security import create_access_token
 from app.core.config import settings
 from app.repositories.user_repository import UserRepository
 from app.schemas.auth import LoginRequest, TokenResponse
 
 class AuthService:
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.user_repo = UserRepository(db)
     
-    def login(self, credentials: LoginRequest) -> TokenResponse:
+    async def login(self, credentials: LoginRequest) -> TokenResponse:
         # 1. Buscar usuario por email
-        user = self.user_repo.get_by_email(credentials.email)
+        user = await self.user_repo.get_by_email(credentials.email)
         
         if not user:
             raise HTTPException(
@@ -25,12 +26,18 @@ class AuthService:
             )
         
         # 2. Verificar contraseña
-        if not verify_password(credentials.password, user.password):
+        # argon2 corre en el pool de procesos de hashing
+        valid, new_hash = await password_hasher.verify_and_update(credentials.password, user.password)
+        if not valid:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Email o contraseña incorrectos",
                 headers={"WWW-Authenticate": "Bearer"},
             )
+
+        # Re-hash transparente si cambiaron los parámetros de argon2
+        if new_hash:
+            await self.user_repo.update_password(user.id, new_hash)
         
         # 3. Verificar que el usuario esté activo
         if not user.is_active:
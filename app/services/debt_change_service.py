@@ -0,0 +1,150 @@
+import time
+from functools import partial
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.change_notifier import debt_change_notifier
+from app.core.config import settings
+from app.core.metrics import debt_change_events, debt_change_streams
+from app.core.pagination import decode_cursor, encode_cursor, fetch_keyset_page
+from app.core.responses import dumps
+from app.database import ReadSessionLocal
+from app.repositories.debt_repository import DebtRepository
+
+# Espera sugerida al cliente antes de reconectar (campo retry de SSE)
+SSE_RETRY_MS = 3000
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Evita que nginx bufferice el stream
+    "X-Accel-Buffering": "no",
+}
+
+def change_cursor(change_id: int) -> str:
+    return encode_cursor({"change": change_id})
+
+def _parse_change_cursor(data: dict) -> dict:
+    return {"after_id": int(data["change"])}
+
+def decode_change_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        return _parse_change_cursor(decode_cursor(cursor))["after_id"]
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+def change_to_dict(change) -> dict:
+    debt = None
+    if change.op != "delete":
+        debt = {
+            "id": change.debt_id,
+            "description": change.description,
+            "value": change.value,
+            "date": change.date,
+            "status": change.status,
+            "user_id": change.user_id,
+        }
+    return {"op": change.op, "debt_id": change.debt_id, "user_id": change.user_id, "debt": debt}
+
+def compact_changes(changes: list) -> list:
+    """
+    Deja solo el último cambio de cada (deuda, dueño), en el orden de ese último cambio.
+    Aplicar el resultado en orden lleva al cliente al mismo estado que aplicar todos.
+    """
+    latest = {}
+    for change in changes:
+        key = (change.debt_id, change.user_id)
+        latest.pop(key, None)
+        latest[key] = change
+    return list(latest.values())
+
+class DebtChangeService:
+    """
+    Feed de cambios de deudas a partir de un cursor: inserts, updates y tombstones.
+    El cursor es el id de debt_changes, que crece en el mismo orden que los commits porque
+    SQLite tiene un único writer: el id se asigna dentro de la transacción que tiene el lock
+    hasta el commit, así un id menor nunca se hace visible después de uno mayor. Con writers
+    concurrentes (otro motor) el cursor se saltaría cambios; database.ensure_supported_backend
+    rechaza cualquier motor que no sea SQLite.
+    """
+
+    def __init__(self, db: Optional[AsyncSession] = None):
+        self.db = db
+
+    async def get_changes(self, since: Optional[str] = None, user_id: Optional[int] = None, limit: int = 500) -> dict:
+        limit = max(1, min(limit, settings.DEBT_CHANGES_MAX_PAGE_SIZE))
+        page = await fetch_keyset_page(
+            partial(DebtRepository(self.db).get_changes, user_id=user_id),
+            limit,
+            since,
+            _parse_change_cursor,
+            lambda last: {"change": last.id},
+        )
+        # A diferencia de los listados, el feed siempre devuelve un cursor: el cliente lo guarda
+        # aunque no haya más cambios y la próxima consulta sigue desde ahí
+        if page.items:
+            next_cursor = change_cursor(page.items[-1].id)
+        else:
+            next_cursor = since or change_cursor(0)
+
+        return {
+            "changes": [change_to_dict(change) for change in compact_changes(page.items)],
+            "next_cursor": next_cursor,
+            "has_more": page.has_more,
+        }
+
+    def stream_changes(self, since: Optional[str] = None, user_id: Optional[int] = None) -> AsyncIterator[bytes]:
+        # El cursor se valida antes de empezar la respuesta: dentro del stream ya no se puede responder 400
+        return self._stream(decode_change_cursor(since), user_id)
+
+    async def _stream(self, after_id: Optional[int], user_id: Optional[int]) -> AsyncIterator[bytes]:
+        page_size = settings.DEBT_CHANGES_MAX_PAGE_SIZE
+        debt_change_streams.inc()
+        try:
+            # Sesiones cortas por consulta: una transacción de lectura abierta todo el stream
+            # impediría los checkpoints del WAL en SQLite
+            if after_id is None:
+                # Sin cursor el stream empieza en el presente
+                async with ReadSessionLocal() as db:
+                    after_id = await DebtRepository(db).get_last_change_id()
+
+            yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+            last_sent = time.monotonic()
+
+            while True:
+                generation = debt_change_notifier.generation
+                async with ReadSessionLocal() as db:
+                    changes = await DebtRepository(db).get_changes(
+                        after_id=after_id, user_id=user_id, limit=page_size
+                    )
+
+                if changes:
+                    # Todos los eventos del lote en un solo write
+                    yield b"".join(self._event(change) for change in changes)
+                    after_id = changes[-1].id
+                    last_sent = time.monotonic()
+                    if len(changes) == page_size:
+                        continue
+
+                idle = time.monotonic() - last_sent
+                timeout = min(settings.DEBT_CHANGES_POLL_SECONDS, max(settings.DEBT_CHANGES_HEARTBEAT_SECONDS - idle, 0))
+                notified = await debt_change_notifier.wait(generation, timeout)
+                if not notified and time.monotonic() - last_sent >= settings.DEBT_CHANGES_HEARTBEAT_SECONDS:
+                    yield b": keepalive\n\n"
+                    last_sent = time.monotonic()
+        finally:
+            debt_change_streams.dec()
+
+    @staticmethod
+    def _event(change) -> bytes:
+        debt_change_events.inc(change.op)
+        # id: permite reanudar con el header Last-Event-ID tras una reconexión
+        return (
+            f"id: {change_cursor(change.id)}\nevent: {change.op}\ndata: ".encode()
+            + dumps(change_to_dict(change))
+            + b"\n\n"
+        )
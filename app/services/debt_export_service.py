@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+import logging
+import time
+from datetime import date
+from typing import AsyncIterator, Optional
+from app.core.config import settings
+from app.database import ReadSessionLocal
+from app.repositories.debt_repository import DebtRepository
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ("id", "description", "value", "date", "status", "user_id")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+class DebtExportService:
+
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = batch_size or settings.DEBT_EXPORT_BATCH_SIZE
+
+    async def export_debts(
+        self,
+        format: str = "ndjson",
+        user_id: Optional[int] = None,
+        status: Optional[bool] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None
+    ) -> AsyncIterator[bytes]:
+        started = time.perf_counter()
+        first_byte_at = None
+        rows = 0
+
+        # Sesión propia: debe seguir abierta mientras se envía la respuesta,
+        # independientemente de cuándo FastAPI cierre las dependencias del request.
+        # La exportación es de solo lectura: va a la réplica si existe
+        async with ReadSessionLocal() as db:
+            repository = DebtRepository(db)
+
+            if format == "csv":
+                yield self._csv_header()
+                first_byte_at = time.perf_counter()
+
+            async for partition in repository.stream_rows(
+                user_id=user_id, status=status, date_from=date_from, date_to=date_to, batch_size=self.batch_size
+            ):
+                rows += len(partition)
+                if format == "csv":
+                    chunk = self._csv_chunk(partition)
+                else:
+                    chunk = self._ndjson_chunk(partition)
+
+                yield chunk
+                if first_byte_at is None:
+                    first_byte_at = time.perf_counter()
+
+        finished = time.perf_counter()
+        ttfb = (first_byte_at or finished) - started
+        logger.info(
+            "export debts format=%s rows=%d ttfb_ms=%.1f total_ms=%.1f",
+            format, rows, ttfb * 1000, (finished - started) * 1000
+        )
+
+    def _ndjson_chunk(self, partition: list) -> bytes:
+        return "".join(
+            json.dumps({
+                "id": row.id,
+                "description": row.description,
+                "value": row.value,
+                "date": row.date.isoformat(),
+                "status": bool(row.status),
+                "user_id": row.user_id,
+            }, ensure_ascii=False) + "\n"
+            for row in partition
+        ).encode()
+
+    def _csv_header(self) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(EXPORT_COLUMNS)
+        return buffer.getvalue().encode()
+
+    def _csv_chunk(self, partition: list) -> bytes:
+        # status con la misma codificación que NDJSON (true/false), no el repr de Python
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            (row.id, row.description, row.value, row.date.isoformat(), "true" if row.status else "false", row.user_id)
+            for row in partition
+        )
+        return buffer.getvalue().encode()
@@ -0,0 +1,237 @@
+import codecs
+import csv
+import io
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.repositories.debt_repository import DebtRepository
+from app.repositories.user_repository import UserRepository
+from app.schemas.debt_schema import CreateDebt, DebtImportReport
+
+REQUIRED_COLUMNS = ("description", "value", "date", "user_id")
+IMPORT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# Progreso de las importaciones recientes (por proceso), consultable mientras corren
+import_reports: OrderedDict[str, DebtImportReport] = OrderedDict()
+
+def get_import_report(import_id: str) -> Optional[DebtImportReport]:
+    return import_reports.get(import_id)
+
+def errors_path(import_id: str) -> str:
+    return os.path.join(settings.DEBT_IMPORT_ERRORS_DIR, f"{import_id}.errors.csv")
+
+def _remove_errors_file(import_id: str) -> None:
+    try:
+        os.remove(errors_path(import_id))
+    except FileNotFoundError:
+        pass
+
+class ImportErrorLog:
+    """
+    CSV de filas rechazadas. Las filas se acumulan en memoria y se escriben por lotes
+    en el threadpool, para no bloquear el event loop con escrituras a disco.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._writer = None
+        self._rows: list[tuple] = [("line", "error", "raw")]
+
+    async def open(self) -> None:
+        self._file = await run_in_threadpool(open, self.path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+
+    def add(self, line: int, message: str, row: list) -> None:
+        self._rows.append((line, message, ",".join(row)))
+
+    async def flush(self) -> None:
+        if not self._rows or self._writer is None:
+            return
+        rows, self._rows = self._rows, []
+        await run_in_threadpool(self._writer.writerows, rows)
+
+    async def close(self) -> None:
+        if self._file is not None:
+            await run_in_threadpool(self._file.close)
+            self._file = None
+
+class DebtImportService:
+    """
+    Importa un CSV de deudas leyendo el body por partes: nunca se carga el archivo
+    completo. Las filas se validan contra CreateDebt y se insertan en lotes de
+    DEBT_IMPORT_CHUNK_SIZE (una transacción por lote). Las filas rechazadas se
+    escriben en un CSV de errores con su número de línea.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.repository = DebtRepository(db)
+        self.user_repository = UserRepository(db)
+        self.chunk_size = settings.DEBT_IMPORT_CHUNK_SIZE
+
+    async def import_csv(self, body: AsyncIterator[bytes], import_id: Optional[str] = None) -> DebtImportReport:
+        import_id = import_id or uuid.uuid4().hex
+        if not IMPORT_ID_PATTERN.match(import_id) or import_id in import_reports:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="import_id inválido o ya utilizado"
+            )
+
+        report = DebtImportReport(import_id=import_id, status="running")
+        await self._track(report)
+        started = time.perf_counter()
+        errors = ImportErrorLog(errors_path(import_id))
+
+        try:
+            await run_in_threadpool(os.makedirs, settings.DEBT_IMPORT_ERRORS_DIR, exist_ok=True)
+            await errors.open()
+            await self._process(body, report, errors)
+            await errors.flush()
+            report.status = "completed"
+        except HTTPException as e:
+            report.status = "failed"
+            report.error = str(e.detail)
+            raise
+        except Exception as e:
+            report.status = "failed"
+            report.error = f"Error inesperado: {e}"
+            raise
+        finally:
+            if report.status == "running":
+                # Cancelación (p. ej. el cliente cortó la subida): no es una Exception
+                report.status = "failed"
+                report.error = "Importación interrumpida"
+            report.elapsed_seconds = round(time.perf_counter() - started, 3)
+            if report.elapsed_seconds > 0:
+                report.rows_per_second = round(report.rows_total / report.elapsed_seconds, 1)
+            await self._finish_errors(report, errors)
+
+        return report
+
+    async def _finish_errors(self, report: DebtImportReport, errors: ImportErrorLog) -> None:
+        # El archivo se cierra siempre; se conserva solo si tiene filas rechazadas
+        await errors.close()
+        if report.rows_failed and import_reports.get(report.import_id) is report:
+            report.errors_url = f"/debts/import/{report.import_id}/errors"
+        else:
+            # Sin rechazos, o el reporte ya salió de import_reports mientras corría
+            await run_in_threadpool(_remove_errors_file, report.import_id)
+
+    async def _process(self, body: AsyncIterator[bytes], report: DebtImportReport, errors: ImportErrorLog) -> None:
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        pending = ""
+        line_number = 0
+        header = None
+        batch: list[tuple[int, CreateDebt, list]] = []
+
+        async for data in body:
+            report.bytes_read += len(data)
+            pending += decoder.decode(data)
+
+            block, pending = self._complete_records(pending)
+            if block:
+                header, line_number = await self._parse_block(block, header, line_number, batch, report, errors)
+
+            # Lo que queda sin cerrar es un solo registro: una comilla sin cerrar lo haría crecer sin límite
+            if len(pending) > settings.DEBT_IMPORT_MAX_RECORD_CHARS:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=(
+                        f"El registro que empieza en la línea {line_number + 1} supera "
+                        f"{settings.DEBT_IMPORT_MAX_RECORD_CHARS} caracteres (¿comilla sin cerrar?)"
+                    )
+                )
+
+        pending += decoder.decode(b"", final=True)
+        if pending.strip():
+            header, line_number = await self._parse_block(pending, header, line_number, batch, report, errors)
+
+        if header is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="El archivo está vacío"
+            )
+
+        await self._flush(batch, report, errors)
+
+    def _complete_records(self, text: str) -> tuple[str, str]:
+        # Corta en el último salto de línea que no quede dentro de un campo entre comillas
+        end = text.rfind("\n")
+        while end != -1 and text.count('"', 0, end) % 2:
+            end = text.rfind("\n", 0, end)
+        if end == -1:
+            return "", text
+        return text[:end + 1], text[end + 1:]
+
+    async def _parse_block(self, block: str, header, line_number: int, batch: list, report: DebtImportReport, errors: ImportErrorLog):
+        reader = csv.reader(io.StringIO(block))
+        record_start = 0
+
+        for row in reader:
+            line = line_number + record_start + 1
+            record_start = reader.line_num
+
+            if not row or not any(field.strip() for field in row):
+                continue
+
+            if header is None:
+                header = [column.strip() for column in row]
+                missing = [column for column in REQUIRED_COLUMNS if column not in header]
+                if missing:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Faltan columnas en el encabezado: {missing}"
+                    )
+                continue
+
+            report.rows_total += 1
+            try:
+                debt = CreateDebt(**{column: value for column, value in zip(header, row) if column in REQUIRED_COLUMNS})
+            except ValidationError as e:
+                self._reject(report, errors, line, "; ".join(error["msg"] for error in e.errors()), row)
+                continue
+
+            batch.append((line, debt, row))
+            if len(batch) >= self.chunk_size:
+                await self._flush(batch, report, errors)
+
+        await errors.flush()
+        return header, line_number + reader.line_num
+
+    async def _flush(self, batch: list, report: DebtImportReport, errors: ImportErrorLog) -> None:
+        if not batch:
+            return
+
+        existing_ids = await self.user_repository.get_existing_ids({debt.user_id for _, debt, _ in batch})
+        valid = []
+        for line, debt, row in batch:
+            if debt.user_id in existing_ids:
+                valid.append(debt.model_dump())
+            else:
+                self._reject(report, errors, line, f"Usuario con ID {debt.user_id} no encontrado", row)
+
+        if valid:
+            ids = await self.repository.bulk_create(valid, batch_size=settings.DEBT_BULK_INSERT_BATCH_SIZE)
+            report.rows_imported += len(ids)
+        batch.clear()
+
+    def _reject(self, report: DebtImportReport, errors: ImportErrorLog, line: int, message: str, row: list) -> None:
+        report.rows_failed += 1
+        errors.add(line, message, row)
+
+    async def _track(self, report: DebtImportReport) -> None:
+        import_reports[report.import_id] = report
+        evicted = []
+        while len(import_reports) > settings.DEBT_IMPORT_MAX_TRACKED:
+            evicted.append(import_reports.popitem(last=False)[0])
+        # El archivo de errores vive lo mismo que su reporte: sin él ya no se puede descargar
+        for import_id in evicted:
+            await run_in_threadpool(_remove_errors_file, import_id)
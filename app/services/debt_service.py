@@ -1,32 +1,150 @@
-from typing import Optional
-from sqlalchemy.orm import Session
+import re
+from functools import partial
+from typing import Optional, Union
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from app.repositories.debt_repository import DebtRepository
+from app.core.config import settings
+from app.core.etag import etag_matches, make_etag
+from app.core.pagination import fetch_keyset_page
+from app.repositories.debt_repository import DebtRepository, filter_sort, unsupported_filter_reason
 from app.repositories.user_repository import UserRepository
-from app.schemas.debt_schema import CreateDebt, UpdateDebt, DebtResponse, DebtWithUserResponse
+from app.repositories.version_repository import VersionRepository
+from app.schemas.debt_schema import (
+    BulkCreateDebtResponse, BulkDebtError, BulkPayResponse, CreateDebt, UpdateDebt, DebtFilter, DebtResponse, DebtSummaryResponse,
+    DebtWithUserResponse
+)
+
+# Palabras (unicode) con un * final opcional para buscar por prefijo
+SEARCH_TERM = re.compile(r"\w+\*?")
+
+def debt_to_dict(debt) -> dict:
+    # Proyección directa para listados: los datos vienen de la BD y no se re-validan
+    return {
+        "id": debt.id,
+        "description": debt.description,
+        "value": debt.value,
+        "date": debt.date,
+        "status": debt.status,
+        "user_id": debt.user_id,
+    }
 
 class DebtService:
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.repository = DebtRepository(db)
         self.user_repository = UserRepository(db)
+        self.version_repository = VersionRepository(db)
     
-    def get_all_debts(self, skip: int = 0, limit: int = 100) -> list[DebtResponse]:
-        debts = self.repository.get_all(skip=skip, limit=limit)
-        return [
-            DebtResponse(
-                id=debt.id,
-                description=debt.description,
-                value=debt.value,
-                date = debt.date,
-                status=debt.status,
-                user_id=debt.user_id
+    async def get_all_debts(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        pagination: str = "offset",
+        order_by: str = "id"
+    ) -> Union[list[dict], dict]:
+        if pagination == "cursor" or cursor is not None:
+            return await self.get_debts_page(limit=limit, cursor=cursor, order_by=order_by)
+
+        debts = await self.repository.get_all(skip=skip, limit=limit)
+        return [debt_to_dict(debt) for debt in debts]
+    
+    async def get_debts_page(self, limit: int = 100, cursor: Optional[str] = None, order_by: str = "id") -> dict:
+        def parse_cursor(data: dict) -> dict:
+            after = {"after_id": int(data["id"])}
+            if order_by == "date":
+                after["after_date"] = date.fromisoformat(data["date"])
+            return after
+
+        def cursor_key(last) -> dict:
+            key = {"id": last.id}
+            if order_by == "date":
+                key["date"] = last.date.isoformat()
+            return key
+
+        page = await fetch_keyset_page(
+            partial(self.repository.get_page, order_by=order_by), limit, cursor, parse_cursor, cursor_key
+        )
+        return {"items": [debt_to_dict(debt) for debt in page.items], "next_cursor": page.next_cursor}
+    
+    async def filter_debts(self, filters: DebtFilter, limit: int = 100, cursor: Optional[str] = None) -> dict:
+        if filters.date_from is not None and filters.date_to is not None and filters.date_from > filters.date_to:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="date_from no puede ser posterior a date_to"
             )
-            for debt in debts
-        ]
+        if filters.min_value is not None and filters.max_value is not None and filters.min_value > filters.max_value:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="min_value no puede ser mayor que max_value"
+            )
+
+        # Solo se aceptan combinaciones que se resuelven con un índice
+        reason = unsupported_filter_reason(filters)
+        if reason is not None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=reason)
+
+        sort = filter_sort(filters)
+        column = sort.lstrip("-")
+        limit = max(1, min(limit, settings.DEBT_FILTER_MAX_LIMIT))
+
+        def parse_cursor(data: dict) -> dict:
+            if data["sort"] != sort:
+                raise ValueError(sort)
+            after = {"after_id": int(data["id"])}
+            if column == "date":
+                after["after_key"] = date.fromisoformat(data["key"])
+            elif column == "value":
+                after["after_key"] = float(data["key"])
+            return after
+
+        def cursor_key(last) -> dict:
+            key = {"sort": sort, "id": last.id}
+            if column != "id":
+                key["key"] = getattr(last, column)
+            return key
+
+        page = await fetch_keyset_page(
+            partial(self.repository.filter, filters), limit, cursor, parse_cursor, cursor_key
+        )
+        return {"items": [debt_to_dict(debt) for debt in page.items], "next_cursor": page.next_cursor}
     
-    def get_debt_by_id(self, debt_id: int) -> DebtWithUserResponse:
-        debt = self.repository.get_by_id(debt_id)
+    async def search_debts(
+        self,
+        q: str,
+        user_id: Optional[int] = None,
+        paid: Optional[bool] = None,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> dict:
+        terms = SEARCH_TERM.findall(q)
+        if not terms:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La búsqueda debe contener al menos una palabra"
+            )
+        if len(terms) > settings.DEBT_SEARCH_MAX_TERMS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Máximo {settings.DEBT_SEARCH_MAX_TERMS} palabras por búsqueda"
+            )
+        limit = max(1, min(limit, settings.DEBT_SEARCH_MAX_LIMIT))
+
+        page = await fetch_keyset_page(
+            partial(self.repository.search, terms, user_id=user_id, status=paid),
+            limit,
+            cursor,
+            lambda data: {"after_rank": float(data["rank"]), "after_id": int(data["id"])},
+            lambda last: {"rank": last.rank, "id": last.id},
+        )
+        return {
+            "items": [{**debt_to_dict(debt), "rank": debt.rank} for debt in page.items],
+            "next_cursor": page.next_cursor,
+        }
+    
+    async def get_debt_by_id(self, debt_id: int) -> DebtWithUserResponse:
+        debt = await self.repository.get_with_user(debt_id)
         if not debt:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -40,64 +158,52 @@ class DebtService:
             date = debt.date,
             status=debt.status,
             user_id=debt.user_id,
-            user_nombre=debt.user.nombre,
-            user_apellido=debt.user.apellido,
-            user_email=debt.user.email
+            user_nombre=debt.user_nombre,
+            user_apellido=debt.user_apellido,
+            user_email=debt.user_email
         )
     
-    def get_debts_by_user(self, user_id: int) -> list[DebtResponse]:
-        # Validar que el usuario existe
-        user = self.user_repository.get_by_id(user_id)
-        if not user:
+    async def get_debts_by_user(self, user_id: int) -> list[dict]:
+        # La existencia del usuario se valida en la misma consulta (None = no existe)
+        debts = await self.repository.get_by_user_id(user_id)
+        if debts is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Usuario con ID {user_id} no encontrado"
             )
         
-        debts = self.repository.get_by_user_id(user_id)
-        return [
-            DebtResponse(
-                id=debt.id,
-                description=debt.description,
-                value=debt.value,
-                date = debt.date,
-                status=debt.status,
-                user_id=debt.user_id
-            )
-            for debt in debts
-        ]
+        return [debt_to_dict(debt) for debt in debts]
+    
+    async def get_debts_by_user_conditional(
+        self, user_id: int, if_none_match: Optional[str] = None
+    ) -> tuple[Optional[str], Optional[list[dict]]]:
+        """Devuelve (etag, deudas); deudas es None si el ETag del cliente sigue vigente (304)."""
+        # La versión se lee antes que las filas: si una escritura se cuela entre ambas lecturas
+        # el ETag queda atrasado y el siguiente poll descarga de nuevo, nunca un 304 con datos viejos
+        etag = make_etag("d", user_id, await self.version_repository.get_debts_version(user_id))
+        if etag_matches(if_none_match, etag):
+            return etag, None
+        return etag, await self.get_debts_by_user(user_id)
     
-    def get_unpaid_debts_by_user(self, user_id: int) -> list[DebtResponse]:
-        user = self.user_repository.get_by_id(user_id)
-        if not user:
+    async def get_unpaid_debts_by_user(self, user_id: int) -> list[dict]:
+        debts = await self.repository.get_unpaid_by_user(user_id)
+        if debts is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Usuario con ID {user_id} no encontrado"
             )
         
-        debts = self.repository.get_unpaid_by_user(user_id)
-        return [
-            DebtResponse(
-                id=debt.id,
-                description=debt.description,
-                value=debt.value,
-                date = debt.date,
-                status=debt.status,
-                user_id=debt.user_id
-            )
-            for debt in debts
-        ]
+        return [debt_to_dict(debt) for debt in debts]
     
-    def create_debt(self, debt_data: CreateDebt) -> DebtResponse:
-        # Validar que el usuario existe
-        user = self.user_repository.get_by_id(debt_data.user_id)
-        if not user:
+    async def create_debt(self, debt_data: CreateDebt) -> DebtResponse:
+        # El INSERT ... SELECT solo inserta si el usuario existe (None = no existe)
+        debt = await self.repository.create(debt_data)
+        if not debt:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Usuario con ID {debt_data.user_id} no encontrado"
             )
         
-        debt = self.repository.create(debt_data)
         return DebtResponse(
             id=debt.id,
             description=debt.description,
@@ -107,23 +213,48 @@ class DebtService:
             user_id=debt.user_id
         )
     
-    def update_debt(self, debt_id: int, debt_data: UpdateDebt) -> DebtResponse:
-        existing_debt = self.repository.get_by_id(debt_id)
-        if not existing_debt:
+    async def create_debts_bulk(self, debts_data: list[CreateDebt], mode: str = "all_or_nothing") -> BulkCreateDebtResponse:
+        if len(debts_data) > settings.DEBT_BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Máximo {settings.DEBT_BULK_MAX_ITEMS} deudas por solicitud"
+            )
+
+        # Validar todos los usuarios referenciados con una sola consulta
+        existing_ids = await self.user_repository.get_existing_ids({debt.user_id for debt in debts_data})
+
+        errors = [
+            BulkDebtError(index=index, user_id=debt.user_id, detail=f"Usuario con ID {debt.user_id} no encontrado")
+            for index, debt in enumerate(debts_data)
+            if debt.user_id not in existing_ids
+        ]
+
+        if errors and mode == "all_or_nothing":
+            missing = sorted({error.user_id for error in errors})
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Deuda con ID {debt_id} no encontrada"
+                detail=f"Usuarios con ID {missing} no encontrados"
             )
-        
-        if debt_data.user_id:
-            user = self.user_repository.get_by_id(debt_data.user_id)
-            if not user:
+
+        valid = [debt.model_dump() for debt in debts_data if debt.user_id in existing_ids]
+        ids = await self.repository.bulk_create(valid, batch_size=settings.DEBT_BULK_INSERT_BATCH_SIZE) if valid else []
+
+        return BulkCreateDebtResponse(created=len(ids), ids=ids, errors=errors)
+    
+    async def update_debt(self, debt_id: int, debt_data: UpdateDebt) -> DebtResponse:
+        # El UPDATE exige en su WHERE que el usuario exista; solo si no afecta filas se
+        # averigua cuál de los dos falta
+        debt = await self.repository.update(debt_id, debt_data)
+        if not debt:
+            if debt_data.user_id and not await self.user_repository.get_existing_ids({debt_data.user_id}):
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Usuario con ID {debt_data.user_id} no encontrado"
                 )
-            
-        debt = self.repository.update(debt_id, debt_data)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Deuda con ID {debt_id} no encontrada"
+            )
         
         return DebtResponse(
             id=debt.id,
@@ -134,8 +265,8 @@ class DebtService:
             user_id=debt.user_id
         )
     
-    def delete_debt(self, debt_id: int) -> dict:
-        deleted = self.repository.delete(debt_id)
+    async def delete_debt(self, debt_id: int) -> dict:
+        deleted = await self.repository.delete(debt_id)
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -144,8 +275,8 @@ class DebtService:
         
         return {"message": f"Deuda con ID {debt_id} eliminada exitosamente"}
     
-    def mark_debt_as_paid(self, debt_id: int) -> DebtResponse:
-        debt = self.repository.mark_as_paid(debt_id)
+    async def mark_debt_as_paid(self, debt_id: int) -> DebtResponse:
+        debt = await self.repository.mark_as_paid(debt_id)
         if not debt:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -159,4 +290,64 @@ class DebtService:
             date = debt.date,
             status=debt.status,
             user_id=debt.user_id
-        )
\ No newline at end of file
+        )
+    
+    async def mark_debts_as_paid(self, debt_ids: list[int], returning: bool = False) -> BulkPayResponse:
+        if len(debt_ids) > settings.DEBT_BULK_MAX_ITEMS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Máximo {settings.DEBT_BULK_MAX_ITEMS} deudas por solicitud"
+            )
+
+        if not debt_ids:
+            return BulkPayResponse(updated=0, debts=[] if returning else None)
+
+        updated, rows = await self.repository.mark_many_as_paid(debt_ids, returning=returning)
+        return self._bulk_pay_response(updated, rows, returning)
+    
+    async def mark_user_debts_as_paid(self, user_id: int, returning: bool = False) -> BulkPayResponse:
+        updated, rows = await self.repository.mark_user_debts_as_paid(user_id, returning=returning)
+        return self._bulk_pay_response(updated, rows, returning)
+    
+    async def mark_debts_before_as_paid(self, before: date, returning: bool = False) -> BulkPayResponse:
+        updated, rows = await self.repository.mark_debts_before_as_paid(before, returning=returning)
+        return self._bulk_pay_response(updated, rows, returning)
+    
+    def _bulk_pay_response(self, updated: int, rows: list, returning: bool) -> BulkPayResponse:
+        return BulkPayResponse(
+            updated=updated,
+            debts=[DebtResponse(**row) for row in rows] if returning else None
+        )
+    
+    async def get_user_summary(self, user_id: int, live: bool = False) -> DebtSummaryResponse:
+        # Por defecto lectura O(1) de debt_summaries; live=True recalcula con GROUP BY
+        if live:
+            summary = await self.repository.compute_summary(user_id)
+        else:
+            summary = await self.repository.get_summary(user_id)
+
+        # Ambas consultas parten de users: None solo cuando el usuario no existe
+        if summary is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Usuario con ID {user_id} no encontrado"
+            )
+
+        return self._summary_response(summary)
+    
+    async def get_leaderboard(self, limit: int = 10, live: bool = False) -> list[DebtSummaryResponse]:
+        if live:
+            summaries = await self.repository.compute_leaderboard(limit)
+        else:
+            summaries = await self.repository.get_leaderboard(limit)
+        return [self._summary_response(summary) for summary in summaries]
+    
+    def _summary_response(self, summary) -> DebtSummaryResponse:
+        return DebtSummaryResponse(
+            user_id=summary["user_id"],
+            total=summary["total"],
+            unpaid_total=summary["unpaid_total"],
+            debt_count=summary["debt_count"],
+            unpaid_count=summary["unpaid_count"],
+            oldest_unpaid_date=summary["oldest_unpaid_date"]
+        )
@@ -1,32 +1,56 @@
 # app/services/user_service.py
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List, Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
+from app.core.etag import etag_matches, make_etag
+from app.core.pagination import fetch_keyset_page
 from app.repositories.user_repository import UserRepository
+from app.repositories.version_repository import VersionRepository
 from app.schemas.user_schema import CreateUser, PostResponse, UpdateUser, UserResponse, UserNameResponse, UserStatusResponse
-from app.infrastructure.external_api import external_api_client
-from app.core.security import get_password_hash
+from app.infrastructure.external_api import cached_external_api_client
+from app.core.hashing import password_hasher
+
+def user_to_dict(user) -> dict:
+    # Proyección directa para listados: los datos vienen de la BD y no se re-validan
+    return {
+        "id": user.id,
+        "email": user.email,
+        "nombre": user.nombre,
+        "apellido": user.apellido,
+        "is_active": user.is_active,
+    }
 
 class UserService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.repository = UserRepository(db)
+        self.version_repository = VersionRepository(db)
     
-    def get_all_users(self, skip: int = 0, limit: int = 100) -> List[UserResponse]:
-        users = self.repository.get_all(skip=skip, limit=limit)
-        # Convertir cada User (SQLAlchemy) a UserResponse (Pydantic)
-        return [
-            UserResponse(
-                id=user.id,
-                email=user.email,
-                nombre=user.nombre,
-                apellido=user.apellido,
-                is_active=user.is_active
-            ) 
-        for user in users
-    ]
+    async def get_all_users(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        pagination: str = "offset"
+    ) -> Union[List[dict], dict]:
+        if pagination == "cursor" or cursor is not None:
+            return await self.get_users_page(limit=limit, cursor=cursor)
+
+        users = await self.repository.get_all(skip=skip, limit=limit)
+        # Proyectar cada User (SQLAlchemy) a dict, sin construir un modelo Pydantic por fila
+        return [user_to_dict(user) for user in users]
+    
+    async def get_users_page(self, limit: int = 100, cursor: Optional[str] = None) -> dict:
+        page = await fetch_keyset_page(
+            self.repository.get_page,
+            limit,
+            cursor,
+            lambda data: {"after_id": int(data["id"])},
+            lambda last: {"id": last.id},
+        )
+        return {"items": [user_to_dict(user) for user in page.items], "next_cursor": page.next_cursor}
     
-    def get_user_by_id(self, user_id: int) -> UserResponse:
-        user = self.repository.get_by_id(user_id)
+    async def get_user_by_id(self, user_id: int) -> UserResponse:
+        user = await self.repository.get_by_id(user_id)
         
         # Validación de negocio: el usuario debe existir
         if not user:
@@ -43,8 +67,18 @@ class UserService:
             is_active=user.is_active
         )
     
+    async def get_user_by_id_conditional(
+        self, user_id: int, if_none_match: Optional[str] = None
+    ) -> tuple[Optional[str], Optional[UserResponse]]:
+        """Devuelve (etag, usuario); usuario es None si el ETag del cliente sigue vigente (304)."""
+        # Versión antes que la fila: un ETag atrasado solo provoca una descarga extra
+        etag = make_etag("u", user_id, await self.version_repository.get_user_version(user_id))
+        if etag_matches(if_none_match, etag):
+            return etag, None
+        return etag, await self.get_user_by_id(user_id)
+    
     async def get_all_posts(self) -> List[PostResponse]:
-        posts = await external_api_client.get_all_posts()
+        posts = await cached_external_api_client.get_all_posts()
         if not posts:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -53,7 +87,7 @@ class UserService:
         return posts
     
     async def get_post_by_id(self, post_id: int) -> PostResponse:
-        post = await external_api_client.get_post_by_id(post_id)
+        post = await cached_external_api_client.get_post_by_id(post_id)
         if not post:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -61,8 +95,11 @@ class UserService:
             )
         return post
     
-    def get_active_users(self) -> List[UserNameResponse]:
-        users = self.repository.get_active_users()
+    def get_external_cache_stats(self) -> dict:
+        return cached_external_api_client.stats()
+    
+    async def get_active_users(self) -> List[UserNameResponse]:
+        users = await self.repository.get_active_users()
         if not users:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -76,17 +113,15 @@ class UserService:
             for user in users
         ]
     
-    def change_user_status(self, user_id: int) -> UserStatusResponse:
-        user_db = self.repository.get_by_id(user_id)
+    async def change_user_status(self, user_id: int) -> UserStatusResponse:
+        user_db = await self.repository.changeStatus(user_id)
         
-        # Validación de negocio: el usuario debe existir
+        # Validación de negocio: el usuario debe existir (RETURNING vacío)
         if not user_db:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Usuario con ID {user_id} no encontrado"
             )
-        
-        user_db = self.repository.changeStatus(user_id)
 
         return UserStatusResponse (
             id=user_db.id,
@@ -94,10 +129,10 @@ class UserService:
             is_active=user_db.is_active
         )
 
-    def create_user(self, user_data: CreateUser) -> UserResponse:
+    async def create_user(self, user_data: CreateUser) -> UserResponse:
 
         # Validación de negocio: email único
-        existing_user = self.repository.get_by_email(user_data.email)
+        existing_user = await self.repository.get_by_email(user_data.email)
 
         if existing_user:
             raise HTTPException(
@@ -108,11 +143,11 @@ class UserService:
         # Convertir Pydantic model a dict
         user_dict = user_data.model_dump()  # ← user_data, no user
         
-        # Hashear password
-        user_dict['password'] = get_password_hash(user_dict['password'])
+        # Hashear password (argon2 corre en el pool de procesos de hashing)
+        user_dict['password'] = await password_hasher.hash(user_dict['password'])
         
         # Crear usuario en BD
-        user = self.repository.create(user_dict)
+        user = await self.repository.create(user_dict)
         
         return UserResponse (
             id=user.id,
@@ -122,11 +157,11 @@ class UserService:
             is_active=user.is_active
         )
     
-    def update_user(self, user_id: int, user_data: UpdateUser) -> UserResponse:
+    async def update_user(self, user_id: int, user_data: UpdateUser) -> UserResponse:
 
         # Validación: si se intenta cambiar el email
         if user_data.email:
-            existing_user = self.repository.get_by_email(user_data.email)
+            existing_user = await self.repository.get_by_email(user_data.email)
             # El email existe Y pertenece a otro usuario
             if existing_user and existing_user.id != user_id:
                 raise HTTPException(
@@ -135,7 +170,7 @@ class UserService:
                 )
         
         # Intentar actualizar
-        user = self.repository.update(user_id, user_data)
+        user = await self.repository.update(user_id, user_data)
         
         # Validación: el usuario debe existir
         if not user:
@@ -152,8 +187,8 @@ class UserService:
             is_active=user.is_active
         )
     
-    def delete_user(self, user_id: int) -> dict:
-        deleted = self.repository.delete(user_id)
+    async def delete_user(self, user_id: int) -> dict:
+        deleted = await self.repository.delete(user_id)
         
         # Validación: el usuario debe existir
         if not deleted:
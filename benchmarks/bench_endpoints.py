@@ -0,0 +1,393 @@
+"""
+Benchmark de todos los endpoints de user_router, debt_router y auth_router contra la
+app ASGI real, en proceso (httpx.ASGITransport, con lifespan), sobre una base sintética.
+
+- La base se genera una vez por (usuarios, deudas, seed) con benchmarks.seed y se copia
+  en cada corrida: las escrituras de una corrida no contaminan la siguiente.
+- La API externa se reemplaza por un stub local (httpx.MockTransport).
+- Por escenario y nivel de concurrencia mide throughput y p50/p95/p99.
+- Escribe un JSON con el commit y la configuración para comparar con benchmarks.compare.
+
+Cliente y servidor comparten el event loop: los números sirven para comparar commits
+entre sí en la misma máquina, no como capacidad absoluta del servicio.
+
+Uso:
+    python -m benchmarks.bench_endpoints [--users 100000] [--debts 10000000]
+        [--concurrency 1,8,32] [--requests 200] [--only debts] [--out results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+import httpx
+from app.core.pagination import encode_cursor
+from benchmarks.seed import BENCH_EMAIL_DOMAIN, BENCH_PASSWORD, FIRST_DATE, database_url, seed_changes
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@dataclass
+class Context:
+    users: int
+    debts: int
+    rng: random.Random
+    headers: dict = field(default_factory=dict)
+    # Los escenarios destructivos consumen IDs desde el final del rango, descendiendo;
+    # los de lectura eligen IDs del 90 % inicial para no toparse con filas borradas
+    next_user_to_delete: int = 0
+    next_debt_to_delete: int = 0
+    created: int = 0
+
+    def user_id(self) -> int:
+        return self.rng.randint(2, max(int(self.users * 0.9), 2))
+
+    def debt_id(self) -> int:
+        return self.rng.randint(1, max(int(self.debts * 0.9), 1))
+
+    def unique(self) -> int:
+        self.created += 1
+        return self.created
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    route: str
+    # Devuelve (url, kwargs de httpx) para cada request
+    build: Callable[[Context], tuple[str, dict]]
+    auth: bool = False
+
+def _debt_payload(ctx: Context) -> dict:
+    return {
+        "description": f"bench {ctx.unique()}",
+        "value": round(ctx.rng.random() * 1000, 2),
+        "date": (FIRST_DATE + timedelta(days=ctx.rng.randrange(730))).isoformat(),
+        "user_id": ctx.user_id(),
+    }
+
+def _import_body(ctx: Context, rows: int = 100, invalid: int = 0) -> bytes:
+    lines = ["user_id,description,value,date"]
+    for i in range(rows):
+        value = "no-es-numero" if i < invalid else round(ctx.rng.random() * 1000, 2)
+        lines.append(f"{ctx.user_id()},import {ctx.unique()},{value},2024-01-01")
+    return ("\n".join(lines) + "\n").encode()
+
+def _delete_user(ctx: Context) -> tuple[str, dict]:
+    user_id, ctx.next_user_to_delete = ctx.next_user_to_delete, ctx.next_user_to_delete - 1
+    return f"/users/{user_id}", {}
+
+def _delete_debt(ctx: Context) -> tuple[str, dict]:
+    debt_id, ctx.next_debt_to_delete = ctx.next_debt_to_delete, ctx.next_debt_to_delete - 1
+    return f"/debts/{debt_id}", {}
+
+# Orden de ejecución: lecturas primero, luego escrituras y al final los borrados
+SCENARIOS = [
+    # auth_router
+    Scenario("auth.login", "POST", "/auth/login", lambda ctx: (
+        "/auth/login", {"json": {"email": f"user{ctx.user_id()}@{BENCH_EMAIL_DOMAIN}", "password": BENCH_PASSWORD}}
+    )),
+    # user_router: lecturas
+    Scenario("users.list", "GET", "/users/", lambda ctx: ("/users/", {"params": {"limit": 100}}), auth=True),
+    Scenario("users.list_cursor", "GET", "/users/", lambda ctx: (
+        "/users/", {"params": {"pagination": "cursor", "limit": 100}}
+    ), auth=True),
+    Scenario("users.active", "GET", "/users/activeUsers", lambda ctx: ("/users/activeUsers", {}), auth=True),
+    Scenario("users.get", "GET", "/users/{user_id}", lambda ctx: (f"/users/{ctx.user_id()}", {}), auth=True),
+    Scenario("users.external_posts", "GET", "/users/external/posts", lambda ctx: ("/users/external/posts", {}), auth=True),
+    Scenario("users.external_post", "GET", "/users/external/posts/{post_id}", lambda ctx: (
+        f"/users/external/posts/{ctx.rng.randint(1, 100)}", {}
+    ), auth=True),
+    Scenario("users.external_cache_stats", "GET", "/users/external/cache/stats", lambda ctx: (
+        "/users/external/cache/stats", {}
+    ), auth=True),
+    # debt_router: lecturas
+    Scenario("debts.list", "GET", "/debts/", lambda ctx: ("/debts/", {"params": {"limit": 100}})),
+    Scenario("debts.list_offset_deep", "GET", "/debts/", lambda ctx: (
+        "/debts/", {"params": {"skip": int(ctx.debts * 0.5), "limit": 100}}
+    )),
+    Scenario("debts.list_cursor_date", "GET", "/debts/", lambda ctx: (
+        "/debts/", {"params": {"pagination": "cursor", "order_by": "date", "limit": 100}}
+    )),
+    Scenario("debts.leaderboard", "GET", "/debts/summary/leaderboard", lambda ctx: ("/debts/summary/leaderboard", {})),
+    Scenario("debts.export_user", "GET", "/debts/export", lambda ctx: (
+        "/debts/export", {"params": {"user_id": ctx.user_id()}}
+    )),
+    Scenario("debts.filter_date", "GET", "/debts/filter", lambda ctx: (
+        "/debts/filter", {"params": {"date_from": "2024-01-01", "date_to": "2024-03-31", "paid": False, "sort": "-date"}}
+    )),
+    Scenario("debts.filter_value", "GET", "/debts/filter", lambda ctx: (
+        "/debts/filter", {"params": {"min_value": 900, "sort": "-value"}}
+    )),
+    Scenario("debts.filter_user", "GET", "/debts/filter", lambda ctx: (
+        "/debts/filter", {"params": {"user_id": ctx.user_id(), "min_value": 100, "sort": "-value"}}
+    )),
+    # Las descripciones sintéticas son "Deuda <id>": el id es un término selectivo y
+    # "deuda" aparece en todas las filas (se acota con el filtro por usuario)
+    Scenario("debts.search", "GET", "/debts/search", lambda ctx: (
+        "/debts/search", {"params": {"q": str(ctx.debt_id())}}
+    )),
+    Scenario("debts.search_user", "GET", "/debts/search", lambda ctx: (
+        "/debts/search", {"params": {"q": "deuda", "user_id": ctx.user_id()}}
+    )),
+    # Feed de cambios: el historial de un usuario desde el inicio y una página a mitad del registro
+    Scenario("debts.changes_user", "GET", "/debts/changes", lambda ctx: (
+        "/debts/changes", {"params": {"user_id": ctx.user_id()}}
+    )),
+    Scenario("debts.changes_page", "GET", "/debts/changes", lambda ctx: (
+        "/debts/changes", {"params": {"since": encode_cursor({"change": ctx.debt_id()}), "limit": 500}}
+    )),
+    Scenario("debts.get", "GET", "/debts/{debt_id}", lambda ctx: (f"/debts/{ctx.debt_id()}", {})),
+    Scenario("debts.by_user", "GET", "/debts/user/{user_id}", lambda ctx: (f"/debts/user/{ctx.user_id()}", {})),
+    Scenario("debts.user_summary", "GET", "/debts/user/{user_id}/summary", lambda ctx: (
+        f"/debts/user/{ctx.user_id()}/summary", {}
+    )),
+    Scenario("debts.user_unpaid", "GET", "/debts/user/{user_id}/unpaid", lambda ctx: (
+        f"/debts/user/{ctx.user_id()}/unpaid", {}
+    )),
+    Scenario("debts.import_status", "GET", "/debts/import/{import_id}", lambda ctx: ("/debts/import/bench", {})),
+    Scenario("debts.import_errors", "GET", "/debts/import/{import_id}/errors", lambda ctx: (
+        "/debts/import/bench/errors", {}
+    )),
+    # Escrituras
+    Scenario("users.create", "POST", "/users/", lambda ctx: ("/users/", {"json": {
+        "email": f"new{ctx.unique()}@{BENCH_EMAIL_DOMAIN}", "nombre": "Bench", "apellido": "Usuario", "password": BENCH_PASSWORD
+    }})),
+    Scenario("users.update", "PUT", "/users/{user_id}", lambda ctx: (
+        f"/users/{ctx.user_id()}", {"json": {"nombre": f"Nombre{ctx.unique()}"}}
+    ), auth=True),
+    Scenario("users.change_status", "POST", "/users/changeStatus/{user_id}", lambda ctx: (
+        f"/users/changeStatus/{ctx.user_id()}", {}
+    ), auth=True),
+    Scenario("debts.create", "POST", "/debts/", lambda ctx: ("/debts/", {"json": _debt_payload(ctx)})),
+    Scenario("debts.bulk", "POST", "/debts/bulk", lambda ctx: (
+        "/debts/bulk", {"json": [_debt_payload(ctx) for _ in range(100)]}
+    )),
+    Scenario("debts.import", "POST", "/debts/import", lambda ctx: (
+        "/debts/import", {"content": _import_body(ctx), "headers": {"content-type": "text/csv"}}
+    )),
+    Scenario("debts.update", "PUT", "/debts/{debt_id}", lambda ctx: (
+        f"/debts/{ctx.debt_id()}", {"json": {"value": round(ctx.rng.random() * 1000, 2)}}
+    )),
+    Scenario("debts.pay", "PATCH", "/debts/{debt_id}/pay", lambda ctx: (f"/debts/{ctx.debt_id()}/pay", {})),
+    Scenario("debts.pay_many", "PATCH", "/debts/pay", lambda ctx: (
+        "/debts/pay", {"json": {"ids": [ctx.debt_id() for _ in range(100)]}}
+    )),
+    Scenario("debts.pay_before", "PATCH", "/debts/pay/before/{before}", lambda ctx: (
+        f"/debts/pay/before/{(FIRST_DATE + timedelta(days=1)).isoformat()}", {}
+    )),
+    Scenario("debts.pay_user", "PATCH", "/debts/user/{user_id}/pay", lambda ctx: (
+        f"/debts/user/{ctx.user_id()}/pay", {}
+    )),
+    # Borrados
+    Scenario("debts.delete", "DELETE", "/debts/{debt_id}", _delete_debt),
+    Scenario("users.delete", "DELETE", "/users/{user_id}", _delete_user, auth=True),
+]
+
+def external_api_stub() -> httpx.MockTransport:
+    posts = [
+        {"userId": i % 10 + 1, "id": i, "title": f"post {i}", "body": "lorem ipsum " * 10}
+        for i in range(1, 101)
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/posts":
+            return httpx.Response(200, json=posts)
+        match = re.fullmatch(r"/posts/(\d+)", request.url.path)
+        if match and 1 <= int(match.group(1)) <= len(posts):
+            return httpx.Response(200, json=posts[int(match.group(1)) - 1])
+        return httpx.Response(404, json={})
+
+    return httpx.MockTransport(handler)
+
+def percentiles(timings: list[float]) -> dict:
+    if len(timings) < 2:
+        value = timings[0] if timings else 0.0
+        return {"p50_ms": value, "p95_ms": value, "p99_ms": value}
+    cuts = statistics.quantiles(timings, n=100, method="inclusive")
+    return {"p50_ms": round(cuts[49], 3), "p95_ms": round(cuts[94], 3), "p99_ms": round(cuts[98], 3)}
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, ctx: Context, concurrency: int, requests: int, warmup: int
+) -> dict:
+    headers = ctx.headers if scenario.auth else {}
+
+    async def send() -> tuple[float, int]:
+        url, kwargs = scenario.build(ctx)
+        kwargs["headers"] = {**headers, **kwargs.get("headers", {})}
+        started = time.perf_counter()
+        response = await client.request(scenario.method, url, **kwargs)
+        return (time.perf_counter() - started) * 1000, response.status_code
+
+    for _ in range(warmup):
+        await send()
+
+    timings: list[float] = []
+    statuses: Counter = Counter()
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            elapsed, status_code = await send()
+            timings.append(elapsed)
+            statuses[status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+
+    return {
+        "scenario": scenario.name,
+        "method": scenario.method,
+        "route": scenario.route,
+        "concurrency": concurrency,
+        "requests": len(timings),
+        "errors": sum(count for code, count in statuses.items() if code >= 400),
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(timings) / wall, 2) if wall else 0.0,
+        "mean_ms": round(statistics.fmean(timings), 3) if timings else 0.0,
+        **percentiles(timings),
+        "max_ms": round(max(timings), 3) if timings else 0.0,
+    }
+
+def _git_revision() -> dict:
+    def git(*args) -> Optional[str]:
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True,
+                cwd=REPO_ROOT
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+async def run(args, scenarios: list[Scenario]) -> list[dict]:
+    # Importes diferidos: DATABASE_URL ya apunta a la copia de la corrida
+    from app.infrastructure.external_api import ExternalApiClient, cached_external_api_client
+    from app.main import app
+
+    stub_client = ExternalApiClient(transport=external_api_stub())
+    cached_external_api_client.client = stub_client
+
+    ctx = Context(
+        users=args.users, debts=args.debts, rng=random.Random(args.seed),
+        next_user_to_delete=args.users, next_debt_to_delete=args.debts,
+    )
+    results = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            response = await client.post("/auth/login", json={"email": f"user1@{BENCH_EMAIL_DOMAIN}", "password": BENCH_PASSWORD})
+            response.raise_for_status()
+            ctx.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            # Importación de referencia para los escenarios de estado/errores
+            await client.post(
+                "/debts/import", params={"import_id": "bench"}, content=_import_body(ctx, rows=10, invalid=2),
+                headers={"content-type": "text/csv"}
+            )
+
+            for scenario in scenarios:
+                for concurrency in args.concurrency:
+                    result = await run_scenario(client, scenario, ctx, concurrency, args.requests, args.warmup)
+                    results.append(result)
+                    print(
+                        f"{scenario.name:<28} c={concurrency:<3} {result['throughput_rps']:>9.1f} req/s  "
+                        f"p50={result['p50_ms']:>8.2f}  p95={result['p95_ms']:>8.2f}  p99={result['p99_ms']:>8.2f} ms  "
+                        f"errores={result['errors']}"
+                    )
+    await stub_client.close()
+    return results
+
+def main(args) -> None:
+    workdir = os.path.abspath(args.workdir)
+    os.makedirs(workdir, exist_ok=True)
+    template = os.path.join(workdir, f"seed-u{args.users}-d{args.debts}-s{args.seed}.db")
+    run_db = os.path.join(workdir, "run.db")
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(run_db + suffix):
+            os.remove(run_db + suffix)
+
+    seeding = None
+    if not os.path.exists(template):
+        # Proceso aparte: la configuración de la app se lee al importarla y aquí debe
+        # apuntar a la copia de la corrida, no a la plantilla
+        print(f"Generando {template} ...")
+        seeding = json.loads(subprocess.run(
+            [sys.executable, "-m", "benchmarks.seed", "--db", template,
+             "--users", str(args.users), "--debts", str(args.debts), "--seed", str(args.seed)],
+            capture_output=True, text=True, check=True, cwd=REPO_ROOT
+        ).stdout.splitlines()[-1])
+        print(seeding)
+    shutil.copyfile(template, run_db)
+    # Una plantilla generada con una versión anterior del esquema se pone al día sobre la copia
+    subprocess.run(
+        [sys.executable, "-m", "app.migrations", "upgrade"],
+        capture_output=True, text=True, check=True, cwd=REPO_ROOT,
+        env={**os.environ, "DATABASE_URL": database_url(run_db)}
+    )
+    # Plantillas anteriores al feed de cambios no traen historial en debt_changes
+    seed_changes(run_db)
+
+    os.environ["DATABASE_URL"] = database_url(run_db)
+    out = os.path.abspath(args.out) if args.out else None
+    os.chdir(workdir)  # archivos de errores de importación, etc.
+
+    pattern = re.compile(args.only) if args.only else None
+    scenarios = [scenario for scenario in SCENARIOS if pattern is None or pattern.search(scenario.name)]
+
+    started = datetime.now()
+    results = asyncio.run(run(args, scenarios))
+
+    from app.core.responses import orjson
+    import sqlalchemy
+    report = {
+        "meta": {
+            **_git_revision(),
+            "started_at": started.isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "orjson": orjson is not None,
+            "users": args.users,
+            "debts": args.debts,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "seeding": seeding,
+        },
+        "results": results,
+    }
+
+    if out is None:
+        commit = (report["meta"]["commit"] or "sin-git")[:10]
+        out = os.path.abspath(f"results-{commit}-{started:%Y%m%d%H%M%S}.json")
+    with open(out, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(f"Resultados: {out}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--debts", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--concurrency", type=lambda value: [int(c) for c in value.split(",")], default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests medidos por escenario y nivel")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", help="regex sobre el nombre del escenario (p. ej. '^debts\\.')")
+    parser.add_argument("--workdir", default="./.bench", help="bases generadas y archivos de la corrida")
+    parser.add_argument("--out", help="ruta del JSON de resultados (por defecto en --workdir)")
+    main(parser.parse_args())
@@ -0,0 +1,88 @@
+"""
+Compara la serialización de listados de 10k filas:
+
+- modelo: un DebtResponse por fila + validación/serialización de response_model
+- rápido: proyección a dict + FastJSONResponse (orjson si está instalado)
+
+Uso:
+    python -m benchmarks.bench_serialization [--rows 10000] [--repeat 20]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+import httpx
+from fastapi import FastAPI
+from app.core.responses import FastJSONResponse, orjson
+from app.schemas.debt_schema import DebtResponse
+from app.services.debt_service import debt_to_dict
+
+def build_rows(count: int) -> list:
+    # Objetos con la misma forma que las entidades Debt cargadas por el repositorio
+    start = date(2024, 1, 1)
+    return [
+        SimpleNamespace(
+            id=i,
+            description=f"Deuda número {i}",
+            value=round(i * 1.37, 2),
+            date=start + timedelta(days=i % 365),
+            status=bool(i % 3 == 0),
+            user_id=i % 1000 + 1,
+        )
+        for i in range(1, count + 1)
+    ]
+
+def build_app(rows: list) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/model", response_model=list[DebtResponse])
+    async def model_path():
+        return [
+            DebtResponse(
+                id=debt.id,
+                description=debt.description,
+                value=debt.value,
+                date = debt.date,
+                status=debt.status,
+                user_id=debt.user_id
+            )
+            for debt in rows
+        ]
+
+    @app.get("/fast", response_model=list[DebtResponse])
+    async def fast_path():
+        return FastJSONResponse([debt_to_dict(debt) for debt in rows])
+
+    return app
+
+async def measure(client: httpx.AsyncClient, path: str, repeat: int) -> list[float]:
+    await client.get(path)  # calentamiento
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+async def main(rows: int, repeat: int) -> None:
+    app = build_app(build_rows(rows))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        model = await measure(client, "/model", repeat)
+        fast = await measure(client, "/fast", repeat)
+
+    encoder = "orjson" if orjson is not None else "json"
+    print(f"filas={rows} repeticiones={repeat} encoder={encoder}")
+    for name, timings in (("modelo", model), ("rápido", fast)):
+        print(f"{name:>7}: p50={statistics.median(timings):8.2f} ms  min={min(timings):8.2f} ms")
+    print(f"speed-up p50: {statistics.median(model) / statistics.median(fast):.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
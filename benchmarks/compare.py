@@ -0,0 +1,61 @@
+"""
+Compara dos resultados de benchmarks.bench_endpoints (p. ej. main vs. una rama).
+
+Marca como regresión un escenario cuyo p95 sube, o cuyo throughput baja, más que
+--threshold por ciento.
+
+Uso:
+    python -m benchmarks.compare base.json nuevo.json [--threshold 10] [--fail-on-regression]
+"""
+import argparse
+import json
+import sys
+
+def _load(path: str) -> tuple[dict, dict]:
+    with open(path, encoding="utf-8") as file:
+        report = json.load(file)
+    results = {(result["scenario"], result["concurrency"]): result for result in report["results"]}
+    return report["meta"], results
+
+def _change(before: float, after: float) -> float:
+    return (after - before) / before * 100 if before else 0.0
+
+def compare(base_path: str, new_path: str, threshold: float) -> list[str]:
+    base_meta, base = _load(base_path)
+    new_meta, new = _load(new_path)
+
+    print(f"base:  {base_meta.get('commit')}  ({base_meta.get('users')} usuarios, {base_meta.get('debts')} deudas)")
+    print(f"nuevo: {new_meta.get('commit')}  ({new_meta.get('users')} usuarios, {new_meta.get('debts')} deudas)")
+    if (base_meta.get("users"), base_meta.get("debts")) != (new_meta.get("users"), new_meta.get("debts")):
+        print("aviso: los volúmenes de datos difieren, la comparación no es directa")
+
+    regressions = []
+    print(f"{'escenario':<28} {'c':>3} {'p50 Δ%':>8} {'p95 Δ%':>8} {'p99 Δ%':>8} {'req/s Δ%':>9}")
+    for key in sorted(base.keys() & new.keys()):
+        before, after = base[key], new[key]
+        p95 = _change(before["p95_ms"], after["p95_ms"])
+        throughput = _change(before["throughput_rps"], after["throughput_rps"])
+        regressed = p95 > threshold or throughput < -threshold
+        if regressed:
+            regressions.append(f"{key[0]} c={key[1]}")
+        print(
+            f"{key[0]:<28} {key[1]:>3} {_change(before['p50_ms'], after['p50_ms']):>+8.1f} {p95:>+8.1f} "
+            f"{_change(before['p99_ms'], after['p99_ms']):>+8.1f} {throughput:>+9.1f}{'  <- regresión' if regressed else ''}"
+        )
+
+    for key in sorted(base.keys() ^ new.keys()):
+        print(f"{key[0]:<28} {key[1]:>3} solo en {'base' if key in base else 'nuevo'}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=10.0, help="porcentaje tolerado en p95 y throughput")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    regressions = compare(args.base, args.new, args.threshold)
+    print(f"{len(regressions)} regresiones por encima de {args.threshold:g} %")
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
@@ -0,0 +1,132 @@
+"""
+Genera una base SQLite sintética y reproducible para los benchmarks.
+
+Aplica la migración 1 (solo tablas), inserta usuarios y deudas con sqlite3 en lotes
+(sin índices secundarios todavía) y luego aplica el resto de migraciones: los índices
+se construyen una sola vez sobre los datos y la migración 3 rellena debt_summaries.
+Por último debt_changes recibe un "insert" por deuda, para medir el feed de cambios.
+
+Uso:
+    python -m benchmarks.seed --db ./bench.db [--users 100000] [--debts 10000000] [--seed 42]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+BENCH_PASSWORD = "Bench1234"
+# EmailStr rechaza dominios de uso especial como .local
+BENCH_EMAIL_DOMAIN = "bench.example.com"
+FIRST_DATE = date(2023, 1, 1)
+DATE_SPAN_DAYS = 730
+BATCH_SIZE = 50_000
+
+def database_url(path: str) -> str:
+    return f"sqlite+aiosqlite:///{path}"
+
+def _users(count: int, password_hash: str):
+    for i in range(1, count + 1):
+        yield (i, f"user{i}@{BENCH_EMAIL_DOMAIN}", f"Nombre{i % 997}", f"Apellido{i % 991}", password_hash, True)
+
+def _debts(count: int, users: int, rng: random.Random):
+    # Fechas como texto ISO: es como las guarda el tipo Date de SQLAlchemy en SQLite
+    dates = [(FIRST_DATE + timedelta(days=day)).isoformat() for day in range(DATE_SPAN_DAYS)]
+    randrange, random_ = rng.randrange, rng.random
+    for i in range(1, count + 1):
+        yield (
+            i,
+            f"Deuda {i}",
+            round(random_() * 1000, 2),
+            dates[randrange(DATE_SPAN_DAYS)],
+            random_() < 0.3,
+            randrange(users) + 1,
+        )
+
+def _insert_batches(conn: sqlite3.Connection, statement: str, rows) -> int:
+    total = 0
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            return total
+        conn.executemany(statement, batch)
+        total += len(batch)
+
+def seed_changes(path: str) -> int:
+    """
+    Rellena debt_changes con un "insert" por deuda, el historial que habría dejado crear
+    esas deudas por la API. No hace nada si el registro ya tiene filas.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            if conn.execute("SELECT 1 FROM debt_changes LIMIT 1").fetchone():
+                return 0
+            return conn.execute(
+                "INSERT INTO debt_changes (op, debt_id, user_id, description, value, date, status) "
+                "SELECT 'insert', id, user_id, description, value, date, status FROM debts ORDER BY id"
+            ).rowcount
+    finally:
+        conn.close()
+
+def seed_database(path: str, users: int, debts: int, seed: int = 42) -> dict:
+    """Crea la base en path (debe no existir). Devuelve tiempos y volúmenes."""
+    # Importes diferidos: DATABASE_URL debe apuntar a path antes de cargar app.database
+    from app.core.security import get_password_hash
+    from app.database import engine
+    from app.migrations import upgrade
+
+    started = time.perf_counter()
+    asyncio.run(upgrade(engine, target=1))
+
+    # Todos los usuarios comparten password: un único hash de argon2
+    password_hash = get_password_hash(BENCH_PASSWORD)
+    rng = random.Random(seed)
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA synchronous=OFF")
+    with conn:
+        _insert_batches(
+            conn,
+            "INSERT INTO users (id, email, nombre, apellido, password, is_active) VALUES (?, ?, ?, ?, ?, ?)",
+            _users(users, password_hash),
+        )
+        _insert_batches(
+            conn,
+            "INSERT INTO debts (id, description, value, date, status, user_id) VALUES (?, ?, ?, ?, ?, ?)",
+            _debts(debts, users, rng),
+        )
+    conn.close()
+    inserted = time.perf_counter()
+
+    asyncio.run(upgrade(engine))
+    asyncio.run(engine.dispose())
+    seed_changes(path)
+    conn = sqlite3.connect(path)
+    conn.execute("ANALYZE")
+    conn.close()
+
+    return {
+        "users": users,
+        "debts": debts,
+        "seed": seed,
+        "insert_seconds": round(inserted - started, 2),
+        "index_seconds": round(time.perf_counter() - inserted, 2),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db", default="./bench.db")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--debts", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if os.path.exists(args.db):
+        parser.error(f"{args.db} ya existe")
+    os.environ["DATABASE_URL"] = database_url(args.db)
+    print(json.dumps(seed_database(args.db, args.users, args.debts, args.seed)))
@@ -0,0 +1,64 @@
+import asyncio
+import os
+import tempfile
+import uuid
+from contextlib import contextmanager
+
+# app.database crea el engine al importarse: la BD temporal se fija antes de importar app
+_database_dir = tempfile.mkdtemp(prefix="fast-api-crud-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_database_dir, 'test.db')}"
+os.environ.pop("DATABASE_REPLICA_URL", None)
+
+import pytest
+from sqlalchemy import event
+from app.database import SessionLocal, engine
+from app.migrations.runner import upgrade
+from app.models.user_model import User
+
+@pytest.fixture(scope="session")
+def run():
+    # Un solo event loop para toda la sesión: las conexiones del pool de aiosqlite quedan atadas a él
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(upgrade())
+    yield loop.run_until_complete
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+@pytest.fixture
+def db(run):
+    session = SessionLocal()
+    yield session
+    run(session.close())
+
+@pytest.fixture
+def make_user(run, db):
+    def make_user() -> int:
+        user = User(
+            email=f"{uuid.uuid4().hex}@example.com",
+            nombre="Juan",
+            apellido="Perez",
+            password="x"
+        )
+        db.add(user)
+        run(db.commit())
+        return user.id
+
+    return make_user
+
+@pytest.fixture
+def captured_statements():
+    @contextmanager
+    def captured_statements():
+        """Sentencias SQL que el engine envía al driver dentro del bloque."""
+        statements: list[str] = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append(" ".join(statement.split()))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            yield statements
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    return captured_statements
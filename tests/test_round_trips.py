@@ -0,0 +1,85 @@
+from datetime import date
+from app.repositories.debt_repository import DebtRepository
+from app.repositories.user_repository import UserRepository
+from app.schemas.debt_schema import CreateDebt, UpdateDebt
+
+def _create_debt(run, db, user_id: int, value: float = 10.0):
+    debt_data = CreateDebt(description="deuda", value=value, date=date(2024, 1, 1), user_id=user_id)
+    return run(DebtRepository(db).create(debt_data))
+
+def test_create_inserts_without_reading_first(run, db, make_user, captured_statements):
+    user_id = make_user()
+
+    with captured_statements() as statements:
+        debt = _create_debt(run, db, user_id)
+
+    assert debt is not None
+    # INSERT ... SELECT (existencia del usuario) + resumen + versiones + feed de cambios
+    assert statements[0].startswith("INSERT INTO debts")
+    assert not [statement for statement in statements if statement.startswith("SELECT")]
+    assert len(statements) == 4
+
+def test_create_for_missing_user_is_one_statement(run, db, captured_statements):
+    with captured_statements() as statements:
+        debt = _create_debt(run, db, user_id=999_999)
+
+    assert debt is None
+    assert len(statements) == 1
+
+def test_update_reads_once_and_writes_once(run, db, make_user, captured_statements):
+    debt = _create_debt(run, db, make_user())
+    new_user_id = make_user()
+
+    with captured_statements() as statements:
+        updated = run(DebtRepository(db).update(debt.id, UpdateDebt(value=25.0, user_id=new_user_id)))
+
+    assert (updated.value, updated.user_id) == (25.0, new_user_id)
+    # SELECT de los valores previos + UPDATE (con la existencia del usuario en el WHERE)
+    # + resumen + versiones + feed de cambios
+    assert statements[0].startswith("SELECT")
+    assert [statement for statement in statements if statement.startswith("UPDATE debts")] == statements[1:2]
+    assert len(statements) == 5
+    assert run(DebtRepository(db).update(debt.id, UpdateDebt(user_id=999_999))) is None
+
+def test_get_with_user_is_one_statement(run, db, make_user, captured_statements):
+    debt = _create_debt(run, db, make_user())
+
+    with captured_statements() as statements:
+        row = run(DebtRepository(db).get_with_user(debt.id))
+
+    assert row.user_email.endswith("@example.com")
+    assert len(statements) == 1
+
+def test_paged_reads_are_one_statement_each(run, db, make_user, captured_statements):
+    user_id = make_user()
+    for value in (1.0, 2.0, 3.0):
+        _create_debt(run, db, user_id, value)
+
+    reads = [
+        lambda: DebtRepository(db).get_page(limit=2),
+        lambda: DebtRepository(db).get_page(limit=2, after_id=1),
+        lambda: DebtRepository(db).get_page(limit=2, after_id=1, after_date=date(2024, 1, 1), order_by="date"),
+        lambda: UserRepository(db).get_page(limit=2),
+        lambda: UserRepository(db).get_page(limit=2, after_id=1),
+    ]
+    for read in reads:
+        with captured_statements() as statements:
+            rows = run(read())
+        assert rows
+        assert len(statements) == 1
+
+def test_bulk_pay_is_set_based(run, db, make_user, captured_statements):
+    user_id = make_user()
+    run(DebtRepository(db).bulk_create([
+        {"description": "deuda", "value": value, "date": date(2020, 1, value), "status": False, "user_id": user_id}
+        for value in range(1, 21)
+    ]))
+
+    with captured_statements() as statements:
+        updated, rows = run(DebtRepository(db).mark_user_debts_as_paid(user_id))
+
+    assert (updated, rows) == (20, [])
+    # Registro de cambios (INSERT ... SELECT) + agregado por usuario + UPDATE + resumen + versiones
+    assert len(statements) == 5
+    assert not [statement for statement in statements if "RETURNING" in statement]
+    assert dict(run(DebtRepository(db).get_summary(user_id))) == dict(run(DebtRepository(db).compute_summary(user_id)))
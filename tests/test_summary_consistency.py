@@ -0,0 +1,51 @@
+import asyncio
+import random
+from datetime import date
+from app.database import SessionLocal
+from app.repositories.debt_repository import DebtRepository
+from app.schemas.debt_schema import CreateDebt, UpdateDebt
+
+WRITERS = 12
+WRITES_PER_WRITER = 15
+
+async def _write(debt_ids: list[int], user_ids: list[int], seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(WRITES_PER_WRITER):
+        async with SessionLocal() as db:
+            repository = DebtRepository(db)
+            operation = rng.random()
+            if operation < 0.2:
+                debt = await repository.create(CreateDebt(
+                    description="concurrente",
+                    value=rng.randint(1, 50),
+                    date=date(2024, 1, rng.randint(1, 28)),
+                    user_id=rng.choice(user_ids)
+                ))
+                debt_ids.append(debt.id)
+                continue
+            # Varios writers sobre las mismas pocas filas: cada uno pisa lo del anterior
+            debt_data = UpdateDebt(value=rng.randint(1, 50), status=rng.random() < 0.5)
+            if operation < 0.4:
+                debt_data = UpdateDebt(user_id=rng.choice(user_ids))
+            await repository.update(rng.choice(debt_ids[:4]), debt_data)
+
+def test_concurrent_writes_keep_summaries_equal_to_live_totals(run, db, make_user):
+    user_ids = [make_user() for _ in range(3)]
+    debt_ids = []
+    for user_id in user_ids:
+        for value in (10, 20):
+            debt = run(DebtRepository(db).create(
+                CreateDebt(description="inicial", value=value, date=date(2024, 1, 1), user_id=user_id)
+            ))
+            debt_ids.append(debt.id)
+
+    async def write_concurrently():
+        await asyncio.gather(*(_write(debt_ids, user_ids, seed) for seed in range(WRITERS)))
+
+    run(write_concurrently())
+
+    repository = DebtRepository(db)
+    for user_id in user_ids:
+        stored = dict(run(repository.get_summary(user_id)))
+        live = dict(run(repository.compute_summary(user_id)))
+        assert stored == live